@@ -1,10 +1,20 @@
+import os
+import sys
 import numpy as np
 
 from EconModel import EconModelClass
 from GEModelTools import GEModelClass
 
+# the shared modules (hetools) are in the repository root
+root = os.path.abspath(os.path.join(os.path.dirname(__file__),os.pardir))
+if not root in sys.path: sys.path.append(root)
+
 import steady_state
+from hetools import shock_sweep
 import household_problem
+from hetools import household_solver
+from hetools import block_profiler
+from hetools import numba_cache
 
 class HANCModelClass(EconModelClass,GEModelClass):    
 
@@ -71,6 +81,7 @@ class HANCModelClass(EconModelClass,GEModelClass):
         # f. grids         
         par.a_max = 500.0 # maximum point in grid for a
         par.Na = 300 # number of grid points
+        par.adaptive_grid = False # use par.a_grid_rel set by find_ss_adaptive instead of equilogspace
 
         # g. misc.
         par.max_iter_solve = 50_000 # maximum number of iterations when solving household problem
@@ -78,10 +89,20 @@ class HANCModelClass(EconModelClass,GEModelClass):
         
         par.tol_solve = 1e-12 # tolerance when solving household problem
         par.tol_simulate = 1e-12 # tolerance when simulating household problem
+        par.direct_D = False # solve for the stationary distribution directly instead of simulating
+        par.hh_solver = 'plain' # solver of the household problem in steady state ('plain' or 'anderson' for Anderson acceleration)
 
         # h. for transition path
         par.max_iter_broyden = 100 # maximum number of iteration when solving eq. system
         par.tol_broyden = 1e-10 # tolerance when solving eq. system
+
+        # i. shocks (jump*rho**t, used by find_IRFs and shock_sweep)
+        par.jump_phi0 = 0.0 # jump in productivity of type 0
+        par.rho_phi0 = 0.90 # persistence
+        par.jump_phi1 = 0.0 # jump in productivity of type 1
+        par.rho_phi1 = 0.90 # persistence
+        par.jump_Gamma = 0.0 # jump in TFP
+        par.rho_Gamma = 0.90 # persistence
           
     def allocate(self):
         """ allocate model """
@@ -95,6 +116,19 @@ class HANCModelClass(EconModelClass,GEModelClass):
         par.beta_grid = np.zeros(par.Nbeta)
         par.eta0_grid = np.zeros(par.Nbeta)
         par.eta1_grid = np.zeros(par.Nbeta)
+        par.a_grid_rel = np.zeros(par.Na) # adaptive grid relative to the highest wage
+
+    def infer_types(self):
+        """ infer types for numba (with namedtuples that can be cached across processes) """
+
+        super().infer_types()
+        numba_cache.stable_namedtuples(self)
 
     prepare_hh_ss = steady_state.prepare_hh_ss
-    find_ss = steady_state.find_ss
\ No newline at end of file
+    find_ss = steady_state.find_ss
+    find_ss_adaptive = steady_state.find_ss_adaptive
+    solve_hh_ss_accelerated = household_solver.solve_hh_ss_accelerated
+    warm_up = numba_cache.warm_up
+
+    shock_sweep = shock_sweep.shock_sweep
+    profile_blocks = block_profiler.profile_blocks
\ No newline at end of file
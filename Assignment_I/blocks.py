@@ -8,7 +8,7 @@ from GEModelTools import lag, lead
 # K_lead = lead(K,ss.K) # copy, same as [K[1],K[1],...,K[-1],ss.K]
 
 
-@nb.njit
+@nb.njit(cache=True)
 def production_firm(par,ini,ss,Gamma,K,phi0,phi1,L0,L1,rK,w0,w1,Y):
 
     # defining lagged K, L1, and Gamma
@@ -24,7 +24,7 @@ def production_firm(par,ini,ss,Gamma,K,phi0,phi1,L0,L1,rK,w0,w1,Y):
     # b. production and investment
     Y[:] = Gamma * K_lag**(par.alpha) * L0**((1.0-par.alpha)/2.0) * L1**((1.0-par.alpha)/2.0)
 
-@nb.njit
+@nb.njit(cache=True)
 def market_clearing(par,ini,ss,A,A_hh,L0,L0_hh,L1,L1_hh,Y,C_hh,K,I,clearing_A,clearing_L0,clearing_L1,clearing_Y):
     # total assets equal to capital
     A[:] = K
@@ -1,35 +1,34 @@
 import numpy as np
 import numba as nb
 
-from consav.linear_interp import interp_1d_vec
+from hetools import egm
 
-@nb.njit(parallel=True)        
+@nb.njit(parallel=True,cache=True)
 def solve_hh_backwards(par,z_trans,rK,w0,w1,phi0,phi1,Gamma,vbeg_a_plus,vbeg_a,a,c,l0,l1,u,ss=False):
     """ solve backwards with vbeg_a from previous iteration (here vbeg_a_plus) """
     
-    for i_fix in nb.prange(par.Nfix):
+    R = 1+rK-par.delta
+    v_a = np.zeros(c.shape)
+
+    # a. solve step (parallel over all combinations of i_fix and i_z)
+    for i_fix_z in nb.prange(par.Nfix*par.Nz):
 
-        # a. solve step
-        for i_z in nb.prange(par.Nz):
+        i_fix = i_fix_z // par.Nz
+        i_z = i_fix_z % par.Nz
 
-            l0[i_fix,i_z,:] = par.eta0_grid[i_fix] * phi0 * par.z_grid[i_z] # labor supply type 0
-            l1[i_fix,i_z,:] = par.eta1_grid[i_fix] * phi1 * par.z_grid[i_z]
+        l0[i_fix,i_z,:] = par.eta0_grid[i_fix] * phi0 * par.z_grid[i_z] # labor supply type 0
+        l1[i_fix,i_z,:] = par.eta1_grid[i_fix] * phi1 * par.z_grid[i_z]
 
-            ## ii. cash-on-hand and utility
-            m = (1+rK-par.delta)*par.a_grid + w0*l0[i_fix,i_z,:] + w1*l1[i_fix,i_z,:]
-            c[i_fix,i_z] = m-a[i_fix,i_z]
+        ## ii. income and utility
+        y = w0*l0[i_fix,i_z,0] + w1*l1[i_fix,i_z,0]
 
-            u[i_fix,i_z] = c[i_fix,i_z]**(1-par.sigma)/(1-par.sigma) - par.nu
+        for i_a in range(par.Na):
+            c_ = R*par.a_grid[i_a] + y - a[i_fix,i_z,i_a]
+            u[i_fix,i_z,i_a] = c_**(1-par.sigma)/(1-par.sigma) - par.nu
 
-            # iii. EGM
-            c_endo = (par.beta_grid[i_fix] * vbeg_a_plus[i_fix,i_z])**(-1/par.sigma)
-            m_endo = c_endo + par.a_grid # current consumption + end-of-period assets
-            
-            # iv. interpolation to fixed grid
-            interp_1d_vec(m_endo, par.a_grid, m, a[i_fix, i_z])
-            a[i_fix,i_z,:] = np.fmax(a[i_fix, i_z, :], 0.0) # enforce borrowing constraint
-            c[i_fix,i_z] = m - a[i_fix, i_z]
+        # iii. EGM (incl. borrowing constraint and marginal value of cash-on-hand)
+        egm.egm(par.a_grid,vbeg_a_plus[i_fix,i_z],par.beta_grid[i_fix],par.sigma,R,y,a[i_fix,i_z],c[i_fix,i_z],v_a[i_fix,i_z])
 
-        # b. expectation step
-        v_a = (1+rK-par.delta) * c[i_fix]**(-par.sigma)
-        vbeg_a[i_fix] = z_trans[i_fix] @ v_a
\ No newline at end of file
+    # b. expectation step
+    for i_fix in nb.prange(par.Nfix):
+        vbeg_a[i_fix] = z_trans[i_fix] @ v_a[i_fix]
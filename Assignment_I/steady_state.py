@@ -1,4 +1,6 @@
+import os
 import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 import numpy as np
 
 from consav.grids import equilogspace
@@ -6,6 +8,8 @@ from consav.markov import log_rouwenhorst
 from consav.misc import elapsed
 
 import root_finding
+from hetools import household_ss
+from hetools.evaluation_cache import take_snapshot
 
 def prepare_hh_ss(model):
     """ prepare the household block to solve for steady state """
@@ -18,7 +22,10 @@ def prepare_hh_ss(model):
     ############
     
     # a. a
-    par.a_grid[:] = equilogspace(0.0,np.max([ss.w0,ss.w1])*par.a_max,par.Na)
+    if par.adaptive_grid:
+        par.a_grid[:] = np.max([ss.w0,ss.w1])*par.a_grid_rel # set by find_ss_adaptive
+    else:
+        par.a_grid[:] = equilogspace(0.0,np.max([ss.w0,ss.w1])*par.a_max,par.Na)
     # par.a_grid[:] = equilogspace(0.0,np.max([ss.w0,ss.w1])*par.a_max,par.Na)
 
     # b. z
@@ -58,9 +65,107 @@ def prepare_hh_ss(model):
     # b. expectation
     ss.vbeg_a[:] = ss.z_trans @ v_a
     
-def obj_ss(K_ss,model,do_print=False):
+##############
+# warm start #
+##############
+
+def reset_warm_start_stats(model):
+    """ reset the iteration counters of the warm start """
+
+    model.warm_start_stats = {
+        'Ncold':0,'it_solve_cold':0,'it_simulate_cold':0,
+        'Nwarm':0,'it_solve_warm':0,'it_simulate_warm':0}
+
+def print_warm_start_stats(model):
+    """ print iterations saved by the warm start """
+
+    stats = model.warm_start_stats
+
+    print(f'warm start: {stats["Nwarm"]} warm and {stats["Ncold"]} cold evaluations')
+    if stats['Nwarm'] == 0 or stats['Ncold'] == 0: return
+
+    for stage in ['solve','simulate']:
+        it_cold_mean = stats[f'it_{stage}_cold']/stats['Ncold']
+        it_warm_mean = stats[f'it_{stage}_warm']/stats['Nwarm']
+        it_saved = stats['Nwarm']*it_cold_mean-stats[f'it_{stage}_warm']
+        print(f' {stage:8s}: {it_warm_mean:8.1f} iterations when warm vs. {it_cold_mean:8.1f} when cold [{it_saved:.0f} iterations saved]')
+
+def regrid_vbeg_a(a_grid_old,a_grid,vbeg_a_old):
+    """ interpolate vbeg_a to a new asset grid """
+
+    vbeg_a = np.zeros(vbeg_a_old.shape[:-1]+(a_grid.size,))
+    for i_fix in range(vbeg_a.shape[0]):
+        for i_z in range(vbeg_a.shape[1]):
+            vbeg_a[i_fix,i_z] = np.interp(a_grid,a_grid_old,vbeg_a_old[i_fix,i_z])
+
+    return vbeg_a
+
+def regrid_Dbeg(a_grid_old,a_grid,Dbeg_old):
+    """ move the mass of Dbeg to a new asset grid using linear lotteries """
+
+    # a. neighboring points and weight on left point
+    i = np.fmin(np.fmax(np.searchsorted(a_grid,a_grid_old,side='right')-1,0),a_grid.size-2)
+    w = (a_grid[i+1]-a_grid_old)/(a_grid[i+1]-a_grid[i])
+    w = np.fmin(np.fmax(w,0.0),1.0)
+
+    # b. distribute mass
+    Dbeg = np.zeros(Dbeg_old.shape[:-1]+(a_grid.size,))
+    np.add.at(Dbeg,(Ellipsis,i),w*Dbeg_old)
+    np.add.at(Dbeg,(Ellipsis,i+1),(1-w)*Dbeg_old)
+
+    return Dbeg
+
+def solve_hh_ss_warm(model,do_print=False):
+    """ solve and simulate the household problem starting from the last converged solution """
+
+    par = model.par
+    ss = model.ss
+
+    if not hasattr(model,'warm_start_stats'): reset_warm_start_stats(model)
+    stats = model.warm_start_stats
+
+    # a. warm start from the solution in ss (if any)
+    warm = np.all(np.isfinite(ss.vbeg_a)) and np.isclose(np.sum(ss.Dbeg),1.0)
+
+    if warm:
+
+        a_grid_old = par.a_grid.copy()
+        vbeg_a_old = ss.vbeg_a.copy()
+        Dbeg_old = ss.Dbeg.copy()
+
+        model.prepare_hh_ss() # grid depends on wages
+        vbeg_a = regrid_vbeg_a(a_grid_old,par.a_grid,vbeg_a_old)
+        Dbeg = regrid_Dbeg(a_grid_old,par.a_grid,Dbeg_old)
+
+        try:
+            it_solve = household_ss.solve_hh_ss(model,do_print=do_print,initial_guess={'vbeg_a':vbeg_a})
+            it_simulate = household_ss.simulate_hh_ss(model,do_print=do_print,Dbeg=Dbeg,count=True)
+            assert np.isfinite(ss.A_hh), 'A_hh is not finite'
+        except Exception as e:
+            if do_print: print(f'warm start failed, falling back to cold start [{e}]')
+            warm = False
+
+    # b. cold start from prepare_hh_ss()
+    if not warm:
+        it_solve = household_ss.solve_hh_ss(model,do_print=do_print)
+        it_simulate = household_ss.simulate_hh_ss(model,do_print=do_print,count=True)
+
+    # c. statistics
+    kind = 'warm' if warm else 'cold'
+    stats[f'N{kind}'] += 1
+    stats[f'it_solve_{kind}'] += it_solve
+    stats[f'it_simulate_{kind}'] += it_simulate
+
+#####################
+# find steady state #
+#####################
+
+def obj_ss(K_ss,model,do_print=False,warm_start=False,cache=None):
     """ objective when solving for steady state capital """
 
+    if cache is not None:
+        return cache.evaluate(obj_ss,K_ss,model,do_print=do_print,warm_start=warm_start)
+
     par = model.par
     ss = model.ss
 
@@ -83,8 +188,11 @@ def obj_ss(K_ss,model,do_print=False):
         print(f'implied {ss.w0 = :.4f}')
         print(f'implied {ss.w1 = :.4f}')
 
-    model.solve_hh_ss(do_print=do_print)
-    model.simulate_hh_ss(do_print=do_print)
+    if warm_start:
+        solve_hh_ss_warm(model,do_print=do_print)
+    else:
+        household_ss.solve_hh_ss(model,do_print=do_print)
+        household_ss.simulate_hh_ss(model,do_print=do_print)
 
     if do_print: print(f'implied {ss.A_hh = :.4f}')
 
@@ -97,39 +205,44 @@ def obj_ss(K_ss,model,do_print=False):
 
     return ss.clearing_A # target to hit
 
-def find_ss(model,method='direct',do_print=False,K_min=1.0,K_max=10.0,NK=10):
+def find_ss(model,method='direct',do_print=False,K_min=1.0,K_max=10.0,NK=10,parallel=False,Nworkers=None,warm_start=False,cache=None,adaptive=False,Na_coarse=100,Na_fine=None):
     """ find steady state using the direct or indirect method """
 
+    if adaptive:
+        return find_ss_adaptive(model,Na_coarse=Na_coarse,Na_fine=Na_fine,method=method,do_print=do_print,K_min=K_min,K_max=K_max,NK=NK,parallel=parallel,Nworkers=Nworkers,warm_start=warm_start,cache=cache)
+
     t0 = time.time()
 
+    if warm_start: reset_warm_start_stats(model)
+
     if method == 'direct':
-        find_ss_direct(model,do_print=do_print,K_min=K_min,K_max=K_max,NK=NK)
+        find_ss_direct(model,do_print=do_print,K_min=K_min,K_max=K_max,NK=NK,parallel=parallel,Nworkers=Nworkers,warm_start=warm_start,cache=cache)
     else:
         raise NotImplementedError
 
     if do_print: print(f'found steady state in {elapsed(t0)}')
-def find_ss_direct(model,do_print=False,K_min=1.0,K_max=10.0,NK=10):
+    if do_print and warm_start: print_warm_start_stats(model)
+    if do_print and cache is not None: print(cache)
+
+def find_ss_direct(model,do_print=False,K_min=1.0,K_max=10.0,NK=10,parallel=False,Nworkers=None,warm_start=False,cache=None):
     """ find steady state using direct method """
 
     # a. broad search
     if do_print: print(f'### step 1: broad search ###\n')
 
     K_ss_vec = np.linspace(K_min,K_max,NK) # trial values
-    clearing_A = np.zeros(K_ss_vec.size) # asset market errors
 
-    for i,K_ss in enumerate(K_ss_vec):
-        
-        try:
-            clearing_A[i] = obj_ss(K_ss,model,do_print=do_print)
-        except Exception as e:
-            clearing_A[i] = np.nan
-            if do_print: print(f'{e}')
-            
-        if do_print: print(f'clearing_A = {clearing_A[i]:12.8f}\n')
+    if parallel:
+        clearing_A = broad_search_parallel(model,K_ss_vec,Nworkers=Nworkers,do_print=do_print,warm_start=warm_start,cache=cache)
+    else:
+        clearing_A = broad_search(model,K_ss_vec,do_print=do_print,warm_start=warm_start,cache=cache)
             
     # b. determine search bracket
     if do_print: print(f'### step 2: determine search bracket ###\n')
 
+    if not (np.any(clearing_A < 0) and np.any(clearing_A > 0)):
+        raise ValueError(f'no sign change of A-A_hh for K in [{K_ss_vec[0]},{K_ss_vec[-1]}]')
+
     K_min = np.max(K_ss_vec[clearing_A < 0])
     K_max = np.min(K_ss_vec[clearing_A > 0])
 
@@ -139,6 +252,247 @@ def find_ss_direct(model,do_print=False,K_min=1.0,K_max=10.0,NK=10):
     if do_print: print(f'### step 3: search ###\n')
 
     root_finding.brentq(
-        obj_ss,K_min,K_max,args=(model,),do_print=do_print,
+        obj_ss,K_min,K_max,args=(model,False,warm_start,cache),do_print=do_print,
         varname='K_ss',funcname='A-A_hh'
     )
+
+def broad_search(model,K_ss_vec,do_print=False,warm_start=False,cache=None):
+    """ evaluate obj_ss at all trial values one at a time """
+
+    clearing_A = np.zeros(K_ss_vec.size) # asset market errors
+
+    for i,K_ss in enumerate(K_ss_vec):
+        
+        try:
+            clearing_A[i] = obj_ss(K_ss,model,do_print=do_print,warm_start=warm_start,cache=cache)
+        except Exception as e:
+            clearing_A[i] = np.nan
+            if do_print: print(f'{e}')
+            
+        if do_print: print(f'clearing_A = {clearing_A[i]:12.8f}\n')
+
+    return clearing_A
+
+#################
+# adaptive grid #
+#################
+
+def adaptive_grid(a_grid,D,c,Na,mass_tol=1e-12,margin=1.5,weight_curv=0.5,weight_mass=0.5):
+    """ asset grid with Na points truncated where D has no mass and refined where D has mass and c curves """
+
+    # a. truncate where the mass above is below mass_tol (with a margin)
+    D_a = np.sum(D,axis=(0,1))
+    mass_above = np.cumsum(D_a[::-1])[::-1] # mass at or above each grid point
+
+    i_max = np.max(np.nonzero(mass_above >= mass_tol)[0])
+    a_max = np.fmin(margin*a_grid[i_max],a_grid[-1])
+
+    I = a_grid <= a_max
+    a = np.append(a_grid[I],a_max) if a_grid[I][-1] < a_max else a_grid[I]
+
+    # b. monitor functions on [0,a_max] (each integrates to one)
+    def integral(f):
+        return np.append(0.0,np.cumsum(0.5*(f[1:]+f[:-1])*np.diff(a)))
+
+    def normalize(f):
+        return f/integral(f)[-1]
+
+    # i. base: density of equilogspace
+    base = normalize(1/(a+0.25))
+
+    # ii. curvature of the consumption function averaged over states
+    c_a = np.gradient(c,a_grid,axis=-1)
+    curv = np.interp(a,a_grid,np.mean(np.abs(np.gradient(c_a,a_grid,axis=-1)),axis=(0,1)))
+    curv = normalize(curv) if np.any(curv > 0) else base
+
+    # iii. density of the distribution
+    mass = normalize(np.interp(a,a_grid,D_a/np.gradient(a_grid)))
+
+    monitor = base + weight_curv*curv + weight_mass*mass
+
+    # c. equidistribute the monitor function
+    M = integral(monitor)
+    a_grid_new = np.interp(np.linspace(0.0,M[-1],Na),M,a)
+    a_grid_new[0] = 0.0
+
+    return a_grid_new
+
+def reallocate(model,Na):
+    """ allocate model with Na asset grid points (scalars in ss are kept) """
+
+    par = model.par
+    ss = model.ss
+
+    ss_scalars = {key:value for key,value in ss.__dict__.items() if np.isscalar(value)}
+
+    par.Na = Na
+    model.allocate()
+
+    for key,value in ss_scalars.items(): ss.__dict__[key] = value
+
+def find_ss_adaptive(model,Na_coarse=100,Na_fine=None,dK=0.05,do_print=False,**kwargs):
+    """ find steady state on a coarse grid and then on an adaptive grid with Na_fine points (default: par.Na//2) starting from the coarse solution
+
+    the model keeps the adaptive grid afterwards: par.Na = Na_fine and par.adaptive_grid = True with the grid in par.a_grid_rel,
+    so prepare_hh_ss() (and everything calling it, e.g. compute_jacs()) gives the grid the steady state is solved on,
+    set par.adaptive_grid = False and reallocate() with the original par.Na to go back to the default grid
+    (done here if the solution fails)
+
+    """
+
+    t0 = time.time()
+
+    par = model.par
+    ss = model.ss
+
+    Na_before = par.Na
+    adaptive_grid_before = par.adaptive_grid
+
+    if Na_fine is None: Na_fine = par.Na//2
+
+    warm_start = kwargs.pop('warm_start',False)
+    cache = kwargs.get('cache')
+
+    # a. coarse grid
+    if do_print: print(f'### coarse grid: Na = {Na_coarse} ###\n')
+
+    model_coarse = model.copy(name=f'{model.name}_coarse')
+    model_coarse.par.adaptive_grid = False
+    reallocate(model_coarse,Na_coarse)
+    model_coarse.find_ss(do_print=do_print,warm_start=warm_start,**kwargs)
+
+    ss_coarse = model_coarse.ss
+    par_coarse = model_coarse.par
+
+    try:
+
+        # b. adaptive grid (relative to wages as in prepare_hh_ss)
+        reallocate(model,Na_fine)
+        a_grid = adaptive_grid(par_coarse.a_grid,ss_coarse.D,ss_coarse.c,par.Na)
+
+        if do_print: print(f'\nadaptive grid: Na = {par.Na}, a_max = {a_grid[-1]:.2f} [coarse grid: a_max = {par_coarse.a_grid[-1]:.2f}]\n')
+
+        par.adaptive_grid = True
+        par.a_grid_rel[:] = a_grid/np.max([ss_coarse.w0,ss_coarse.w1])
+
+        # c. initial guess from the coarse solution
+        for varname in ['rK','w0','w1']: ss.__dict__[varname] = ss_coarse.__dict__[varname]
+        model.prepare_hh_ss()
+
+        ss.vbeg_a[:] = regrid_vbeg_a(par_coarse.a_grid,par.a_grid,ss_coarse.vbeg_a)
+        ss.Dbeg[:] = regrid_Dbeg(par_coarse.a_grid,par.a_grid,ss_coarse.Dbeg)
+
+        # d. adaptive grid in a narrow bracket around the coarse solution (warm started)
+        if do_print: print(f'### adaptive grid: Na = {par.Na} ###\n')
+
+        reset_warm_start_stats(model)
+
+        K_bracket = np.array([ss_coarse.K*(1-dK),ss_coarse.K*(1+dK)])
+        clearing_A = broad_search(model,K_bracket,do_print=do_print,warm_start=True,cache=cache)
+
+        if clearing_A[0]*clearing_A[1] < 0: # sign change (False if an evaluation failed)
+
+            root_finding.brentq(
+                obj_ss,K_bracket[0],K_bracket[1],args=(model,False,True,cache),do_print=do_print,
+                varname='K_ss',funcname='A-A_hh'
+            )
+
+        else:
+
+            if do_print: print('root not in narrow bracket, using the full broad search')
+            find_ss(model,do_print=do_print,warm_start=True,**kwargs)
+
+    except Exception:
+
+        par.adaptive_grid = adaptive_grid_before
+        reallocate(model,Na_before)
+        raise
+
+    if do_print: print(f'found steady state on adaptive grid in {elapsed(t0)}')
+
+###################
+# parallel search #
+###################
+
+_worker_model = None # model copy owned by each worker process
+
+def _init_worker(modelclass,model_dict):
+    """ create the model copy of a worker process """
+
+    global _worker_model
+
+    _worker_model = modelclass(name='worker')
+    _worker_model.from_dict(model_dict,do_copy=False)
+
+def _obj_ss_worker(K_ss,do_snapshot=False,warm_start=False):
+    """ evaluate obj_ss on the model copy of the worker process (warm started from the last evaluation of the worker if warm_start) """
+
+    try:
+        clearing_A = obj_ss(K_ss,_worker_model,warm_start=warm_start)
+    except Exception:
+        return np.nan,None
+
+    snapshot = take_snapshot(_worker_model) if do_snapshot else None
+    return clearing_A,snapshot
+
+def is_bracketed(clearing_A):
+    """ check whether two neighboring trial values bracket the root """
+
+    # note: nan compares as False, and a pending value is nan
+    return np.any((clearing_A[:-1] < 0) & (clearing_A[1:] > 0))
+
+def broad_search_parallel(model,K_ss_vec,Nworkers=None,do_print=False,warm_start=False,cache=None):
+    """ evaluate obj_ss at the trial values in parallel and stop when the root is bracketed
+
+    with warm_start each worker starts from its own last evaluation (the first from the solution in model),
+    the warm start statistics of the workers are not collected
+
+    """
+
+    t0 = time.time()
+
+    if Nworkers is None: Nworkers = os.cpu_count()
+    Nworkers = min(Nworkers,K_ss_vec.size)
+
+    clearing_A = np.nan*np.ones(K_ss_vec.size) # asset market errors, nan = failed or not evaluated
+    
+    # a. start workers with their own model copy
+    executor = ProcessPoolExecutor(max_workers=Nworkers,
+        initializer=_init_worker,initargs=(model.__class__,model.as_dict()))
+
+    try:
+
+        # b. submit all trial values (in order, so the low K values are evaluated first)
+        do_snapshot = cache is not None
+        futures = {executor.submit(_obj_ss_worker,K_ss,do_snapshot,warm_start):i for i,K_ss in enumerate(K_ss_vec)}
+        pending = set(futures)
+
+        def collect(future):
+
+            i = futures[future]
+            clearing_A[i],snapshot = future.result()
+            if snapshot is not None: # bracket end points are evaluated again by brentq
+                cache.store(cache.key('obj_ss',K_ss_vec[i],model),clearing_A[i],snapshot)
+            if do_print: print(f'K_ss = {K_ss_vec[i]:12.8f} -> clearing_A = {clearing_A[i]:12.8f}')
+
+        # c. collect until the root is bracketed by two neighboring trial values
+        while len(pending) > 0:
+
+            done,pending = wait(pending,return_when=FIRST_COMPLETED)
+            for future in done: collect(future)
+
+            if is_bracketed(clearing_A): break
+
+    finally:
+
+        # d. cancel the trial values not started and wait for the running ones (no worker outlives the search)
+        executor.shutdown(wait=True,cancel_futures=True)
+
+    for future in pending:
+        if not future.cancelled(): collect(future)
+
+    if do_print: 
+        Nevals = np.sum(~np.isnan(clearing_A))
+        print(f'\nbroad search done in {elapsed(t0)} [{Nevals} of {K_ss_vec.size} trial values evaluated, {Nworkers} workers]\n')
+
+    return clearing_A
@@ -1,10 +1,21 @@
+import os
+import sys
 import numpy as np
 
 from EconModel import EconModelClass
 from GEModelTools import GEModelClass
 
+# the shared modules (hetools) are in the repository root
+root = os.path.abspath(os.path.join(os.path.dirname(__file__),os.pardir))
+if not root in sys.path: sys.path.append(root)
+
 import steady_state
+from hetools import shock_sweep
+from hetools import model_copy
 import household_problem
+from hetools import household_solver
+from hetools import block_profiler
+from hetools import numba_cache
 
 class HANCWelfareModelClass(EconModelClass,GEModelClass):    
 
@@ -78,16 +89,42 @@ class HANCWelfareModelClass(EconModelClass,GEModelClass):
         par.tol_ell = 1e-12 # tolerance when solving for ell 
         par.tol_solve = 1e-12 # tolerance when solving household problem
         par.tol_simulate = 1e-12 # tolerance when simulating household problem
+        par.direct_D = False # solve for the stationary distribution directly instead of simulating
+        par.hh_solver = 'plain' # solver of the household problem in steady state ('plain' or 'anderson' for Anderson acceleration)
+        par.warm_ell = False # warm start the refinement at the constraint from the previous iteration (set in the steady state solve only)
         par.tol_broyden = 1e-10 # tolerance when solving eq. system
 
+        # f. shocks (jump*rho**t, used by find_IRFs and shock_sweep)
+        par.jump_tau = 0.0 # jump in tax rate
+        par.rho_tau = 0.90 # persistence
+        par.jump_chi = 0.0 # jump in lump sum transfers
+        par.rho_chi = 0.90 # persistence
+
     def allocate(self):
         """ allocate model """
 
         par = self.par
 
+        par.ell_stats = np.zeros((par.Nfix*par.Nz,5)) # refinement at constraint: calls, constrained points, warm started, iterations, max iterations
+
         self.allocate_GE() # should always be called here
 
+    def infer_types(self):
+        """ infer types for numba (with namedtuples that can be cached across processes) """
+
+        super().infer_types()
+        numba_cache.stable_namedtuples(self)
+
     prepare_hh_ss = steady_state.prepare_hh_ss
     find_ss = steady_state.find_ss
     optimize_social_welfare = steady_state.optimize_social_welfare
-    exp_util = steady_state.exp_util
\ No newline at end of file
+    optimize_social_welfare_parallel = steady_state.optimize_social_welfare_parallel
+    exp_util = steady_state.exp_util
+    exp_util_path = steady_state.exp_util_path
+    ce_gains = steady_state.ce_gains
+    solve_hh_ss_accelerated = household_solver.solve_hh_ss_accelerated
+    warm_up = numba_cache.warm_up
+
+    shock_sweep = shock_sweep.shock_sweep
+    copy_cow = model_copy.copy_cow
+    profile_blocks = block_profiler.profile_blocks
\ No newline at end of file
@@ -8,7 +8,7 @@ import numba as nb
 
 from GEModelTools import lag, lead
 
-@nb.njit
+@nb.njit(cache=True)
 def production_firm(par,ini,ss,K,L,rK,w,Y):
 
     K_lag = lag(ini.K,K)
@@ -20,7 +20,7 @@ def production_firm(par,ini,ss,K,L,rK,w,Y):
     # b. production and investment
     Y[:] = par.Gamma_Y*K_lag**(par.alpha)*L**(1-par.alpha)
 
-@nb.njit
+@nb.njit(cache=True)
 def mutual_fund(par,ini,ss,K,rK,A,r):
 
     # a. total assets
@@ -29,7 +29,7 @@ def mutual_fund(par,ini,ss,K,rK,A,r):
     # b. return
     r[:] = rK-par.delta
 
-@nb.njit
+@nb.njit(cache=True)
 def government(par,ini,ss,B,G,Lg,L,w,wt,tau,chi):
  
     B[:] = ss.B
@@ -38,7 +38,7 @@ def government(par,ini,ss,B,G,Lg,L,w,wt,tau,chi):
     wt[:] = (1-tau)*w
     
 
-@nb.njit
+@nb.njit(cache=True)
 def market_clearing(par,ini,ss,A,A_hh,L,Lg,L_hh,Y,C_hh,K,I,G,w,tau,chi,clearing_A,clearing_L,clearing_Y,clearing_G):
 
     clearing_A[:] = A-A_hh
@@ -1,78 +1,174 @@
 import numpy as np
 import numba as nb
 
-from consav.linear_interp import interp_1d_vec
+from hetools import egm
 
-@nb.njit
+@nb.njit(parallel=True,cache=True)
 def solve_hh_backwards(par,z_trans,wt,w,r,vbeg_a_plus,vbeg_a,a,c,ell,l,inc,u,s,tau,chi):
     """ solve backwards with vbeg_a_plus from previous iteration """
 
-    for i_fix in range(par.Nfix):
+    v_a = np.zeros(c.shape)
+    failed = np.zeros(par.Nfix*par.Nz,dtype=np.bool_) # no raise inside prange
+
+    # work arrays for the refinement at the constraint
+    ell_warm = np.zeros(c.shape)
+    ell_lo = np.zeros(c.shape)
+    ell_hi = np.zeros(c.shape)
+    done = np.zeros(c.shape,dtype=np.bool_)
+
+    # a. solution step (parallel over all combinations of i_fix and i_z)
+    for i_fix_z in nb.prange(par.Nfix*par.Nz):
+
+        i_fix = i_fix_z // par.Nz
+        i_z = i_fix_z % par.Nz
+
+        # i. prepare
+        z = par.z_grid[i_z]
+        fac = (wt*z/par.varphi)**(1/par.nu)
+
+        # warm start: constrained solution from the previous iteration in a and ell (zero if not constrained),
+        # only if par.warm_ell as a and ell are only overwritten by the previous iteration in the steady state
+        if par.warm_ell:
+            for i_a in range(par.Na):
+                if a[i_fix,i_z,i_a] == 0.0 and ell[i_fix,i_z,i_a] > 0.0:
+                    ell_warm[i_fix,i_z,i_a] = ell[i_fix,i_z,i_a]
+                else:
+                    break
+
+        # ii. EGM with labor supply (fused focs, re-interpolation and saving)
+        egm.egm_labor(par.a_grid,vbeg_a_plus[i_fix,i_z],par.beta,par.sigma,par.nu,fac,z,wt,1+r,chi,
+                      a[i_fix,i_z],c[i_fix,i_z],ell[i_fix,i_z],l[i_fix,i_z])
+
+        # iii. refinement at constraint
+        failed[i_fix_z] = refine_constrained(par,fac,z,wt,r,chi,i_fix_z,
+            a[i_fix,i_z],c[i_fix,i_z],ell[i_fix,i_z],l[i_fix,i_z],
+            ell_warm[i_fix,i_z],ell_lo[i_fix,i_z],ell_hi[i_fix,i_z],done[i_fix,i_z])
+
+        # iv. other outputs
+        for i_a in range(par.Na):
+            c_ = c[i_fix,i_z,i_a]
+            s[i_fix,i_z,i_a] = par.Gamma_G*l[i_fix,i_z,i_a]*w*tau / (w+par.Gamma_G)
+            inc[i_fix,i_z,i_a] = wt*l[i_fix,i_z,i_a] + r*par.a_grid[i_a] + chi
+            u[i_fix,i_z,i_a] = c_**(1-par.sigma)/(1-par.sigma) - par.varphi*ell[i_fix,i_z,i_a]**(1+par.nu)/(1+par.nu)
+            v_a[i_fix,i_z,i_a] = c_**(-par.sigma)
         
-        # a. solution step
+    if np.any(failed): raise ValueError('too many iterations searching for ell')
+
+    # b. expectation step (parallel over all combinations of i_fix and i_z_lag)
+    for i_fix_z in nb.prange(par.Nfix*par.Nz):
+
+        i_fix = i_fix_z // par.Nz
+        i_z_lag = i_fix_z % par.Nz
+
+        vbeg_a[i_fix,i_z_lag] = 0.0
         for i_z in range(par.Nz):
+            vbeg_a[i_fix,i_z_lag] += z_trans[i_fix,i_z_lag,i_z]*v_a[i_fix,i_z]
+        
+        vbeg_a[i_fix,i_z_lag] *= 1+r
 
-            # i. prepare
-            z = par.z_grid[i_z]
-            fac = (wt*z/par.varphi)**(1/par.nu)
+############################
+# refinement at constraint #
+############################
 
-            # ii. use focs
-            c_endo = (par.beta*vbeg_a_plus[i_fix,i_z,:])**(-1/par.sigma)
-            ell_endo = fac*c_endo**(-par.sigma/par.nu)
-            l_endo = ell_endo*z
+@nb.njit(cache=True)
+def refine_constrained(par,fac,z,wt,r,chi,i_row,a,c,ell,l,ell_warm,ell_lo,ell_hi,done):
+    """ solve the labor supply foc for all constrained points as a batch with safeguarded Newton, returns True if failed """
 
-            # iii. re-interpolate
-            m_endo = c_endo + par.a_grid - wt*l_endo #-par.chi
-            m_exo = (1+r)*par.a_grid + chi
+    # a. constrained points (a prefix of the grid)
+    Ncon = 0
+    while Ncon < par.Na and a[Ncon] < 1e-8: Ncon += 1
 
-            interp_1d_vec(m_endo,c_endo,m_exo,c[i_fix,i_z,:])
-            interp_1d_vec(m_endo,ell_endo,m_exo,ell[i_fix,i_z,:])
-            l[i_fix,i_z,:] = ell[i_fix,i_z,:]*z
+    if Ncon == 0: return False
 
-            # iv. saving
-            a[i_fix,i_z,:] = m_exo + wt*l[i_fix,i_z,:] - c[i_fix,i_z,:] #+par.chi
+    # b. brackets and initial guesses
+    # with c(ell) = m + wt*z*ell and m = (1+r)*a_lag + chi, f(ell) = ell - fac*c(ell)**(-sigma/nu) is increasing in ell
+    # for c(ell) > 0, i.e. ell > ell_lo = max(0,-m/(wt*z)), and f(ell) -> -inf as c(ell) -> 0 (f(0) < 0 if m > 0),
+    # ell_hi is doubled from the bound for m = 0 until f(ell_hi) >= 0 (immediately if m >= 0, i.e. chi >= 0)
+    ell_hi_m0 = (fac*(wt*z)**(-par.sigma/par.nu))**(par.nu/(par.nu+par.sigma))
 
-            # v. refinement at constraint
-            for i_a in range(par.Na):
+    Nwarm = 0
+    for i_a in range(Ncon):
 
-                if a[i_fix,i_z,i_a] < 1e-8:
-                    
-                    # o. binding constraint for a
-                    a[i_fix,i_z,i_a] = 0.0
+        a[i_a] = 0.0 # binding constraint for a
 
-                    # oo. solve foc for n
-                    elli = ell[i_fix,i_z,i_a]
+        m = (1+r)*par.a_grid[i_a] + chi
+        ell_lo_ = np.fmax(0.0,-m/(wt*z))
+        ell_hi_ = np.fmax(ell_hi_m0,2*ell_lo_)
+        while ell_hi_ - fac*(m+wt*z*ell_hi_)**(-par.sigma/par.nu) < 0.0: ell_hi_ *= 2
 
-                    it = 0
-                    while True:
+        ell_lo[i_a] = ell_lo_
+        ell_hi[i_a] = ell_hi_
+        done[i_a] = False
 
-                        ci = (1+r)*par.a_grid[i_a] + wt*elli*z + chi
+        if ell_lo_ < ell_warm[i_a] < ell_hi_:
+            ell[i_a] = ell_warm[i_a]
+            Nwarm += 1
+        elif not ell_lo_ < ell[i_a] < ell_hi_:
+            ell[i_a] = 0.5*(ell_lo_+ell_hi_)
 
-                        error = elli - fac*ci**(-par.sigma/par.nu)
-                        if np.abs(error) < par.tol_ell:
-                            break
-                        else:
-                            derror = 1 - fac*(-par.sigma/par.nu)*ci**(-par.sigma/par.nu-1)*wt*z
-                            elli = elli - error/derror
+    # c. Newton iterations over the points not yet converged
+    it = 0
+    Nactive = Ncon
+    while Nactive > 0:
 
-                        it += 1
-                        if it > par.max_iter_ell: raise ValueError('too many iterations searching for ell')
+        if it > par.max_iter_ell: break
+        it += 1
 
-                    # ooo. save
-                    c[i_fix,i_z,i_a] = ci
-                    ell[i_fix,i_z,i_a] = elli
-                    l[i_fix,i_z,i_a] = elli*z
-                    
-                else:
+        Nactive = 0
+        for i_a in range(Ncon):
 
-                    break
+            if done[i_a]: continue
 
-        s[i_fix] = par.Gamma_G*l[i_fix]*w*tau / (w+par.Gamma_G)
-        inc[i_fix] = wt*l[i_fix] + r*par.a_grid + chi
-        u[i_fix,:,:] = c[i_fix]**(1-par.sigma)/(1-par.sigma) - par.varphi*ell[i_fix]**(1+par.nu)/(1+par.nu)
-        
-        # b. expectation step
-        v_a = c[i_fix]**(-par.sigma)
-        vbeg_a[i_fix] = (1+r)*z_trans[i_fix]@v_a
-    
-       
\ No newline at end of file
+            elli = ell[i_a]
+            ci = (1+r)*par.a_grid[i_a] + wt*elli*z + chi
+
+            error = elli - fac*ci**(-par.sigma/par.nu)
+            if np.abs(error) < par.tol_ell:
+                c[i_a] = ci
+                l[i_a] = elli*z
+                done[i_a] = True
+                continue
+
+            Nactive += 1
+
+            # i. update bracket
+            if error < 0.0:
+                ell_lo[i_a] = elli
+            else:
+                ell_hi[i_a] = elli
+
+            # ii. Newton step (bisection if outside bracket)
+            derror = 1 - fac*(-par.sigma/par.nu)*ci**(-par.sigma/par.nu-1)*wt*z
+            elli = elli - error/derror
+
+            if not ell_lo[i_a] < elli < ell_hi[i_a]:
+                elli = 0.5*(ell_lo[i_a]+ell_hi[i_a])
+
+            ell[i_a] = elli
+
+    # d. statistics
+    par.ell_stats[i_row,0] += 1
+    par.ell_stats[i_row,1] += Ncon
+    par.ell_stats[i_row,2] += Nwarm
+    par.ell_stats[i_row,3] += it
+    par.ell_stats[i_row,4] = np.fmax(par.ell_stats[i_row,4],it)
+
+    return Nactive > 0
+
+def reset_ell_stats(model):
+    """ reset the iteration statistics of the refinement at the constraint """
+
+    model.par.ell_stats[:] = 0.0
+
+def print_ell_stats(model):
+    """ print the iteration statistics of the refinement at the constraint """
+
+    calls,Ncon,Nwarm,it = model.par.ell_stats[:,:4].sum(axis=0)
+    it_max = model.par.ell_stats[:,4].max()
+
+    if calls == 0: 
+        print('refinement at constraint: no constrained points')
+        return
+
+    print(f'refinement at constraint: {calls:.0f} batches with {Ncon/calls:.1f} points on average [{Nwarm/Ncon:.1%} warm started]')
+    print(f' Newton iterations per batch: {it/calls:.2f} on average, {it_max:.0f} at most')
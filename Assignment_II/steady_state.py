@@ -1,4 +1,8 @@
+import os
 import time
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import numba as nb
 from scipy import optimize
@@ -7,6 +11,9 @@ from consav.grids import equilogspace
 from consav.markov import log_rouwenhorst
 from consav.misc import elapsed
 
+from hetools import household_ss
+from hetools.evaluation_cache import EvaluationCache, take_snapshot, restore_snapshot
+
 def prepare_hh_ss(model):
     """ prepare the household block to solve for steady state """
 
@@ -48,7 +55,88 @@ def prepare_hh_ss(model):
         # b. expectation
         ss.vbeg_a[i_fix] = ss.z_trans[i_fix]@v_a
 
-def obj_ss(x,model,do_print=False):
+##############
+# warm start #
+##############
+
+@contextlib.contextmanager
+def warm_ell(model):
+    """ warm start the refinement at the constraint from the previous iteration while active (steady state only) """
+
+    par = model.par
+
+    warm_ell_before = par.warm_ell
+    par.warm_ell = True
+
+    try:
+        yield
+    finally:
+        par.warm_ell = warm_ell_before
+
+def reset_warm_start_stats(model):
+    """ reset the iteration counters of the warm start """
+
+    model.warm_start_stats = {
+        'Ncold':0,'it_solve_cold':0,'it_simulate_cold':0,
+        'Nwarm':0,'it_solve_warm':0,'it_simulate_warm':0}
+
+def print_warm_start_stats(model):
+    """ print iterations saved by the warm start """
+
+    stats = model.warm_start_stats
+
+    print(f'warm start: {stats["Nwarm"]} warm and {stats["Ncold"]} cold evaluations')
+    if stats['Nwarm'] == 0 or stats['Ncold'] == 0: return
+
+    for stage in ['solve','simulate']:
+        it_cold_mean = stats[f'it_{stage}_cold']/stats['Ncold']
+        it_warm_mean = stats[f'it_{stage}_warm']/stats['Nwarm']
+        it_saved = stats['Nwarm']*it_cold_mean-stats[f'it_{stage}_warm']
+        print(f' {stage:8s}: {it_warm_mean:8.1f} iterations when warm vs. {it_cold_mean:8.1f} when cold [{it_saved:.0f} iterations saved]')
+
+def solve_hh_ss_warm(model,do_print=False):
+    """ solve and simulate the household problem starting from the last converged solution """
+
+    ss = model.ss
+
+    if not hasattr(model,'warm_start_stats'): reset_warm_start_stats(model)
+    stats = model.warm_start_stats
+
+    # a. warm start from the solution in ss (if any)
+    warm = np.all(np.isfinite(ss.vbeg_a)) and np.isclose(np.sum(ss.Dbeg),1.0)
+
+    if warm:
+
+        vbeg_a = ss.vbeg_a.copy()
+        Dbeg = ss.Dbeg.copy()
+
+        try:
+            it_solve = household_ss.solve_hh_ss(model,do_print=do_print,initial_guess={'vbeg_a':vbeg_a})
+            it_simulate = household_ss.simulate_hh_ss(model,do_print=do_print,Dbeg=Dbeg,count=True)
+            assert np.isfinite(ss.A_hh), 'A_hh is not finite'
+        except Exception as e:
+            if do_print: print(f'warm start failed, falling back to cold start [{e}]')
+            warm = False
+
+    # b. cold start from prepare_hh_ss()
+    if not warm:
+        it_solve = household_ss.solve_hh_ss(model,do_print=do_print)
+        it_simulate = household_ss.simulate_hh_ss(model,do_print=do_print,count=True)
+
+    # c. statistics
+    kind = 'warm' if warm else 'cold'
+    stats[f'N{kind}'] += 1
+    stats[f'it_solve_{kind}'] += it_solve
+    stats[f'it_simulate_{kind}'] += it_simulate
+
+#####################
+# find steady state #
+#####################
+
+def obj_ss(x,model,do_print=False,warm_start=False,cache=None):
+
+    if cache is not None:
+        return cache.evaluate(obj_ss,x,model,do_print=do_print,warm_start=warm_start)
 
     KL = x[0]
 
@@ -70,8 +158,12 @@ def obj_ss(x,model,do_print=False):
     # d. households
     ss.wt = (1-ss.tau)*ss.w
     
-    model.solve_hh_ss(do_print=do_print)
-    model.simulate_hh_ss(do_print=do_print)
+    with warm_ell(model):
+        if warm_start:
+            solve_hh_ss_warm(model,do_print=do_print)
+        else:
+            household_ss.solve_hh_ss(model,do_print=do_print)
+            household_ss.simulate_hh_ss(model,do_print=do_print)
 
     # e. market clearing
     ss.Lg = (ss.L_hh * ss.w*ss.tau-ss.chi) / (ss.w+par.Gamma_G)
@@ -89,30 +181,44 @@ def obj_ss(x,model,do_print=False):
 
     return ss.clearing_A
 
-def find_ss(model,do_print=False):
+def find_ss(model,do_print=False,warm_start=False,cache=None):
     """ find the steady state """
 
     t0 = time.time()
 
     par = model.par
     ss = model.ss
+
+    if warm_start: reset_warm_start_stats(model)
+
+    # exogenous government policy (part of the cache key)
+    ss.tau = par.tau_ss
+    ss.chi = par.chi_ss
     
     KL_min = ((1/par.beta+par.delta-1)/(par.alpha*par.Gamma_Y))**(1/(par.alpha-1)) + 1e-2
     KL_max = (par.delta/(par.alpha*par.Gamma_Y))**(1/(par.alpha-1))-1e-2
     KL_mid = (KL_min+KL_max)/2 # middle point between max values as initial capital labor ratio
 
     # a. solve for K and L
-    initial_guess =  np.array([KL_mid])
-    if do_print: print(f'starting at [{initial_guess[0]:.4f}]')
+    key = cache.key('find_ss',[],model) if cache is not None else None
+    x = cache.lookup(key,model) if cache is not None else None
 
-    res = optimize.root(obj_ss, initial_guess, args=(model,))
-    if do_print: 
-        print('')
-        print(res)
-        print('')
+    if x is None:
+
+        initial_guess =  np.array([KL_mid])
+        if do_print: print(f'starting at [{initial_guess[0]:.4f}]')
+
+        res = optimize.root(obj_ss, initial_guess, args=(model,False,warm_start,cache))
+        if do_print: 
+            print('')
+            print(res)
+            print('')
+
+        x = res.x
+        if cache is not None: cache.store(key,x)
     
     # b. final evaluations
-    obj_ss(res.x,model)
+    obj_ss(x,model,warm_start=warm_start,cache=cache)
 
     # c. show
     if do_print:
@@ -135,22 +241,97 @@ def find_ss(model,do_print=False):
         print(f'{ss.clearing_Y = :.2e}')
         print(f'{ss.clearing_G = :.2e}')
 
+        if warm_start: print_warm_start_stats(model)
+        if cache is not None: print(cache)
+
+###########
+# welfare #
+###########
+
+def util_G(par,G):
+    """ utility of public spending """
+
+    return (G+par.S)**(1-par.omega)/(1-par.omega)
+
+def util_c(par,c):
+    """ utility of consumption """
+
+    return c**(1-par.sigma)/(1-par.sigma)
+
+def weighted_mean(x,D,by_type=False):
+    """ distribution-weighted mean over the last three axes (over the last two if by_type) """
 
-def exp_util(model):
+    axis = (-2,-1) if by_type else (-3,-2,-1)
+    return np.sum(x*D,axis=axis)/np.sum(D,axis=axis)
+
+def exp_util(model,by_type=False):
     """ calculate expected utility """
 
     par = model.par
     ss = model.ss
     
-    # find expected utility
-    util = np.sum([par.beta**t * ((np.sum((ss.u+(ss.G+par.S)**(1-par.omega)/(1-par.omega)) * ss.D / (np.sum(ss.D))))) for t in range(par.T)])
+    # a. period utility (constant in steady state)
+    W = weighted_mean(ss.u,ss.D,by_type=by_type) + util_G(par,ss.G)
+
+    # b. discounted sum over T periods
+    util = W*(1-par.beta**par.T)/(1-par.beta)
     
     return util
 
-def optimize_social_welfare(model,tau_guess,chi_guess=np.NaN,do_print=False):
+def exp_util_path(model,by_type=False):
+    """ calculate expected utility along the transition path """
+
+    par = model.par
+    path = model.path
+
+    # a. period utility (T x 1 or T x Nfix)
+    G = path.G.reshape(par.T,-1)[:,:1]
+    W = weighted_mean(path.u,path.D,by_type=by_type).reshape(par.T,-1) + util_G(par,G)
+
+    # b. discounted sum
+    beta_t = par.beta**np.arange(par.T)
+    util = beta_t@W
+
+    return util if by_type else util[0]
+
+def ce_gains(model,baseline,transition=True,by_type=True):
+    """ consumption-equivalent gain of the transition path (or steady state) of model relative to the baseline steady state """
+
+    par = baseline.par
+    ss = baseline.ss
+
+    # a. reform
+    if transition:
+        util = exp_util_path(model,by_type=by_type)
+    else:
+        util = exp_util(model,by_type=by_type)
+
+    # b. baseline split into consumption utility and the rest
+    fac = (1-par.beta**par.T)/(1-par.beta)
+    util_base = exp_util(baseline,by_type=by_type)
+    util_base_c = weighted_mean(util_c(par,ss.c),ss.D,by_type=by_type)*fac
+
+    # c. scaling of baseline consumption giving the same utility
+    return ((util-(util_base-util_base_c))/util_base_c)**(1/(1-par.sigma))-1
+
+def obj_social_welfare(tau,chi,model,warm_start=False,cache=None):
+    """ negative social welfare in the steady state with taxes tau and transfers chi """
+
+    par = model.par
+
+    par.tau_ss = tau
+    par.chi_ss = chi
+
+    model.find_ss(warm_start=warm_start,cache=cache)
+    val = model.exp_util()
+
+    return -val
+
+def optimize_social_welfare(model,tau_guess,chi_guess=np.NaN,do_print=False,warm_start=False,cache=None):
     """ optimizer for social welfare based on taxes and chi"""
     par = model.par
     ss = model.ss
+    if cache is None: cache = EvaluationCache() # final find_ss() restores the optimum
     # a. guess
     tau = tau_guess
     if np.isnan(chi_guess): #setting chi to 0 if no guess is given
@@ -162,16 +343,7 @@ def optimize_social_welfare(model,tau_guess,chi_guess=np.NaN,do_print=False):
     def obj(tau,chi,model):
         """ objective function for social welfare maximization """
 
-        par = model.par
-        ss = model.ss
-
-        par.tau_ss = tau
-        par.chi_ss = chi
-    
-        model.find_ss()
-        val = model.exp_util()
-
-        return -val
+        return obj_social_welfare(tau,chi,model,warm_start=warm_start,cache=cache)
     
     # c. solve
     t0 = time.time()
@@ -184,7 +356,7 @@ def optimize_social_welfare(model,tau_guess,chi_guess=np.NaN,do_print=False):
         par.chi_ss = res.x[1]
     
     # d. final evaluation
-    model.find_ss()
+    model.find_ss(warm_start=warm_start,cache=cache)
 
     # e. print
     print(f'Optimal taxes found in {elapsed(t0)}')
@@ -216,5 +388,114 @@ def optimize_social_welfare(model,tau_guess,chi_guess=np.NaN,do_print=False):
 
     return par.tau_ss, par.chi_ss
 
+###############################
+# parallel multi-start search #
+###############################
+
+_worker_model = None # model copy owned by each worker process
+_worker_cache = None # evaluation cache of each worker process
+_worker_table = None # table of all function values shared by the workers
+
+def _init_worker(modelclass,model_dict,table):
+    """ create the model copy of a worker process """
+
+    global _worker_model, _worker_cache, _worker_table
+
+    _worker_model = modelclass(name='worker')
+    _worker_model.from_dict(model_dict,do_copy=False)
+
+    _worker_cache = EvaluationCache()
+    _worker_table = table
+
+def _welfare_worker(tau,chi):
+    """ negative social welfare from the shared table or from a new steady state """
+
+    key = (float(tau),float(chi))
+
+    val = _worker_table.get(key)
+    if val is None:
+
+        try:
+            val = obj_social_welfare(tau,chi,_worker_model,warm_start=True,cache=_worker_cache)
+        except Exception:
+            val = np.inf
+
+        _worker_table[key] = val
+
+    return val
+
+def _refine_worker(x0,options):
+    """ local Nelder-Mead refinement from x0 """
+
+    res = optimize.minimize(lambda x: _welfare_worker(x[0],x[1]),x0=x0,method='Nelder-Mead',options=options)
+
+    # steady state at the optimum (typically restored from the cache)
+    obj_social_welfare(res.x[0],res.x[1],_worker_model,warm_start=True,cache=_worker_cache)
+
+    return res.x,res.fun,res.nfev,take_snapshot(_worker_model)
+
+def optimize_social_welfare_parallel(model,tau_grid,chi_grid,Nstarts=4,Nworkers=None,options=None,do_print=False):
+    """ parallel multi-start optimizer for social welfare based on taxes and chi """
 
+    t0 = time.time()
+
+    par = model.par
+    ss = model.ss
+
+    if Nworkers is None: Nworkers = os.cpu_count()
+
+    tau_grid = np.asarray(tau_grid,dtype=float)
+    chi_grid = np.asarray(chi_grid,dtype=float)
+
+    manager = multiprocessing.Manager()
+    table = manager.dict()
+
+    with ProcessPoolExecutor(max_workers=Nworkers,initializer=_init_worker,
+        initargs=(model.__class__,model.as_dict(),table)) as executor:
+
+        # a. coarse grid
+        t0_grid = time.time()
+
+        grid = [(tau,chi) for tau in tau_grid for chi in chi_grid]
+        vals = np.array(list(executor.map(_welfare_worker,*zip(*grid))))
+
+        if do_print: print(f'coarse grid with {len(grid)} points evaluated in {elapsed(t0_grid)}')
+
+        # b. local refinements from the best grid cells
+        t0_refine = time.time()
+
+        I = np.argsort(vals)[:Nstarts]
+        I = I[np.isfinite(vals[I])]
+        assert I.size > 0, 'social welfare could not be evaluated at any grid point'
+        
+        x0s = [np.array(grid[i]) for i in I]
+        results = list(executor.map(_refine_worker,x0s,[options]*len(x0s)))
+
+        if do_print: print(f'{len(x0s)} local refinements done in {elapsed(t0_refine)}')
+
+    table = dict(table)
+    manager.shutdown()
+
+    # c. best refinement
+    i_best = np.argmin([fun for _x,fun,_nfev,_snapshot in results])
+    x,fun,_nfev,snapshot = results[i_best]
+
+    par.tau_ss = x[0]
+    par.chi_ss = x[1]
+    restore_snapshot(model,snapshot)
+
+    # d. print
+    print(f'Optimal taxes found in {elapsed(t0)}')
+    if do_print:
+
+        Nfev = len(grid) + np.sum([nfev for _x,_fun,nfev,_snapshot in results])
+        print(f'{len(table)} unique steady states solved for {Nfev} function evaluations [{Nworkers} workers]')
+
+        for x0,(x,fun,nfev,_snapshot) in zip(x0s,results):
+            print(f' start at [{x0[0]:6.4f},{x0[1]:7.4f}] -> [{x[0]:6.4f},{x[1]:7.4f}]: {-fun:9.4f} [{nfev} evaluations]')
+
+        print(f'Expected utility: {-fun = :6.4f}')
+        print(f'Optimal wage tax: {ss.tau = :6.4f}')
+        print(f'Optimal lump sum transfer: {ss.chi = :6.4f}')
 
+    return par.tau_ss, par.chi_ss, table
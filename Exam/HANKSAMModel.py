@@ -1,13 +1,35 @@
+import os
+import sys
 import numpy as np
 
-import matplotlib.pyplot as plt
-colors = plt.rcParams['axes.prop_cycle'].by_key()['color']
-
 from EconModel import EconModelClass
 from GEModelTools import GEModelClass
 
+# the shared modules (hetools) are in the repository root
+root = os.path.abspath(os.path.join(os.path.dirname(__file__),os.pardir))
+if not root in sys.path: sys.path.append(root)
+
 import household_problem
+import household_simulation
 import steady_state
+from hetools import shock_sweep
+from hetools import model_copy
+import jacobian_store
+import array_store
+import toeplitz_jacobian
+import transition_batch
+from hetools import household_solver
+from hetools import block_profiler
+from hetools import numba_cache
+
+def __getattr__(name):
+    """ matplotlib is imported when colors is used (not at module load) """
+
+    if name == 'colors':
+        import matplotlib.pyplot as plt
+        return plt.rcParams['axes.prop_cycle'].by_key()['color']
+
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 class HANKSAMModelClass(EconModelClass,GEModelClass):    
 
@@ -80,6 +102,7 @@ class HANKSAMModelClass(EconModelClass,GEModelClass):
         par.beta_BS = 0.940**(1/12) # discount factor of buffer-stock households
         par.beta_PIH = 0.975**(1/12) # discount factor of permanent income hypothethis households
         par.beta_RA = np.nan # discount factor of representative agent set in ss
+        par.A_hh_RA = np.nan # assets of representative agent (set from model_HANK in find_ss or given)
         par.beta_firm = 0.975**(1/12) # discount factor of firms
 
         par.HtM_share = 0.30 # share of HtM households
@@ -117,6 +140,8 @@ class HANKSAMModelClass(EconModelClass,GEModelClass):
         # g. shocks
         par.rho_G = 0.80 # persistence of government spending
         par.jump_G = np.nan # jump (determined in ss)
+        par.rho_u_bar = 0.80 # persistence of UI duration
+        par.jump_u_bar = 0.0 # jump
 
         # h. household problem
         par.Nu = 10 # number of unemployment states
@@ -132,11 +157,13 @@ class HANKSAMModelClass(EconModelClass,GEModelClass):
         
         par.tol_solve = 1e-12 # tolerance when solving
         par.tol_simulate = 1e-12 # tolerance when simulating
+        par.direct_D = False # solve for the stationary distribution directly instead of simulating
+        par.hh_solver = 'plain' # solver of the household problem in steady state ('plain' or 'anderson' for Anderson acceleration)
         par.tol_broyden = 1e-10 # tolerance when solving eq. system
 
         par.py_hh = False
         par.py_blocks = False
-        par.full_z_trans = True
+        par.full_z_trans = False # search intensity does not depend on assets -> z_trans is Nfix x Nz x Nz
 
     def allocate(self):
         """ allocate model """
@@ -155,25 +182,75 @@ class HANKSAMModelClass(EconModelClass,GEModelClass):
         par.i_u_hh = np.zeros((par.Nfix,par.Nz))
         par.i_u_hh[:,1:] = np.arange(1,par.Nu+1)
 
+        par.i_z_next = np.fmin(np.arange(par.Nz)+1,par.Nz-1) # next z if not employed next period
+        par.Dz_ss = np.zeros(par.Nz) # ergodic distribution of z (used in RA mode)
+
         # b. beta
         par.beta_grid = np.nan*np.ones(par.Nfix)
         par.beta_shares = np.nan*np.ones(par.Nfix)
 
+        # c. hand-to-mouth types (closed form: a = 0 and c = m)
+        par.is_HtM = np.zeros(par.Nfix,dtype=np.bool_)
+        par.is_HtM[0] = True
+
+    def infer_types(self):
+        """ infer types for numba (with namedtuples that can be cached across processes) """
+
+        super().infer_types()
+        numba_cache.stable_namedtuples(self)
+
     prepare_hh_ss = steady_state.prepare_hh_ss
     find_ss = steady_state.find_ss
+    simulate_hh_ss = household_simulation.simulate_hh_ss
+    simulate_hh_path = household_simulation.simulate_hh_path
+    solve_hh_ss_accelerated = household_solver.solve_hh_ss_accelerated
+    warm_up = numba_cache.warm_up
         
     fiscal_multiplier = steady_state.fiscal_multiplier
 
+    shock_sweep = shock_sweep.shock_sweep
+    copy_cow = model_copy.copy_cow
+    compute_jacs_cached = jacobian_store.compute_jacs_cached
+    offload = array_store.offload
+    compress_jac_hh = toeplitz_jacobian.compress_jac_hh
+    find_transition_paths = transition_batch.find_transition_paths
+    profile_blocks = block_profiler.profile_blocks
+
 # Reperesentative agent model
 class RANKSAMModelClass(HANKSAMModelClass):
 
-    # same settings
     # same allocate 
 
+    def settings(self):
+        """ fundamental settings """
+
+        super().settings()
+
+        # a. no heterogeneous households
+        self.grids_hh = []
+        self.pols_hh = []
+        self.inputs_hh = []
+        self.inputs_hh_z = []
+        self.outputs_hh = []
+        self.intertemps_hh = []
+
+        self.solve_hh_backwards = None
+
+        # b. analytic representative agent instead of household block
+        self.blocks = ['blocks.hh_RA' if block == 'hh' else block for block in self.blocks]
+
     def setup(self):
 
         super().setup() # calls setup from HANKModelClass
         self.par.RA = True
 
-    # note: the heterogenous households are still there, but does not matter for transition path
-    # this is a simple though not computationally efficient implementation
\ No newline at end of file
+    def create_HANK(self):
+        """ HANK model with the same parameters and shocks (solve it and pass it to find_ss as model_HANK for the steady state assets) """
+
+        par = {key:value for key,value in self.par.__dict__.items() if np.isscalar(value) and not key == 'RA'}
+        
+        model_HANK = HANKSAMModelClass(name=f'{self.name}_HANK',par=par)
+        for varname in self.shocks:
+            model_HANK.ss.__dict__[varname] = self.ss.__dict__[varname]
+
+        return model_HANK
\ No newline at end of file
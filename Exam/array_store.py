@@ -0,0 +1,157 @@
+import os
+import json
+import atexit
+import shutil
+import tempfile
+import numpy as np
+
+from jacobian_store import JAC_ATTRS
+
+# the large arrays of a model (the path and the Jacobians) are moved to .npy files and replaced by memory maps,
+#  only the pages which are read (or written) are in memory, e.g. a multiplier only reads the variables it uses,
+#  and written pages are flushed to the file, so they can be dropped by the operating system
+#
+# the maps are plain ndarrays (views of np.memmap) such that the model can still be used with numba,
+# model.copy() gives a copy in memory (offload it as well or use model.copy_cow())
+#
+# usage:
+#  store = ArrayStore()
+#  store.offload(model) # after compute_jacs() and find_transition_path()
+#  model_ = ArrayStore(path).attach(ModelClass(name)) # in another process (if path is not temporary)
+
+class ArrayStore():
+    """ on-disk store of the path and Jacobians of models with one folder per model name """
+
+    def __init__(self,path=None,mmap_mode='r+'):
+        """ path=None gives a temporary folder (removed at exit), mmap_mode is passed to np.load ('r+': changes are written to the files) """
+
+        if path is None:
+            path = tempfile.mkdtemp(prefix='array_store_')
+            atexit.register(shutil.rmtree,path,ignore_errors=True)
+
+        self.path = path
+        self.mmap_mode = mmap_mode
+
+    def folder(self,name):
+
+        return os.path.join(self.path,name)
+
+    def __contains__(self,name):
+
+        return os.path.isfile(os.path.join(self.folder(name),'index.json'))
+
+    def _map(self,folder,filename):
+        """ memory map of a file as a plain ndarray (nothing is read before it is used) """
+
+        return np.load(os.path.join(folder,filename),mmap_mode=self.mmap_mode).view(np.ndarray)
+
+    def offload(self,model,namespaces=('path',),attrs=JAC_ATTRS,min_nbytes=2**16):
+        """ move the arrays larger than min_nbytes in namespaces and attrs of model to files and map them """
+
+        folder = self.folder(model.name)
+        os.makedirs(folder,exist_ok=True)
+
+        index = {}
+
+        def offload_array(array,filename):
+
+            if not type(array) is np.ndarray or array.nbytes < min_nbytes or array.dtype.hasobject: return array
+
+            # written to a new file which replaces the old (which may be mapped by array itself)
+            np.save(os.path.join(folder,f'.{filename}'),array)
+            os.replace(os.path.join(folder,f'.{filename}'),os.path.join(folder,filename))
+
+            return self._map(folder,filename)
+
+        # a. namespaces
+        for ns in namespaces:
+
+            namespace = getattr(model,ns)
+            index[ns] = []
+
+            for key,value in namespace.__dict__.items():
+                mapped = offload_array(value,f'{ns}.{key}.npy')
+                if mapped is value: continue
+                namespace.__dict__[key] = mapped
+                index[ns].append([key,f'{ns}.{key}.npy'])
+
+        # b. Jacobians
+        for attr in attrs:
+
+            value = getattr(model,attr,None)
+
+            if type(value) is np.ndarray:
+
+                mapped = offload_array(value,f'{attr}.npy')
+                if mapped is value: continue
+                setattr(model,attr,mapped)
+                index[attr] = f'{attr}.npy'
+
+            elif type(value) is dict:
+
+                index[attr] = []
+                for i,(key,jac) in enumerate(value.items()):
+                    mapped = offload_array(jac,f'{attr}_{i}.npy')
+                    if mapped is jac: continue
+                    value[key] = mapped
+                    index[attr].append([list(key) if type(key) is tuple else key,f'{attr}_{i}.npy'])
+
+        # c. index (written last)
+        with open(os.path.join(folder,'index.json'),'w') as f:
+            json.dump(index,f)
+
+        return folder
+
+    def attach(self,model,name=None):
+        """ map the stored arrays of name (default: model.name) into model, returns False if not stored """
+
+        if name is None: name = model.name
+        if not name in self: return False
+
+        folder = self.folder(name)
+        with open(os.path.join(folder,'index.json')) as f:
+            index = json.load(f)
+
+        for attr,value in index.items():
+
+            if type(value) is str: # Jacobian array
+
+                setattr(model,attr,self._map(folder,value))
+
+            elif attr in model.namespaces: # namespace
+
+                namespace = getattr(model,attr)
+                for key,filename in value:
+                    namespace.__dict__[key] = self._map(folder,filename)
+
+            else: # dictionary of Jacobians
+
+                jacs = getattr(model,attr,None)
+                if jacs is None:
+                    jacs = {}
+                    setattr(model,attr,jacs)
+
+                for key,filename in value:
+                    key = tuple(key) if type(key) is list else key
+                    jacs[key] = self._map(folder,filename)
+
+        return True
+
+    def nbytes(self,name):
+        """ size of the stored arrays of name """
+
+        folder = self.folder(name)
+        return sum(os.path.getsize(os.path.join(folder,filename)) for filename in os.listdir(folder) if filename.endswith('.npy'))
+
+    def clear(self):
+        """ remove all stored arrays (maps which are still in use remain valid) """
+
+        shutil.rmtree(self.path,ignore_errors=True)
+
+def offload(model,store=None,**kwargs):
+    """ move the path and the Jacobians of model to memory-mapped files, returns the store """
+
+    if store is None: store = ArrayStore()
+    store.offload(model,**kwargs)
+
+    return store
@@ -3,7 +3,7 @@ import numba as nb
 
 from GEModelTools import lag, lead, prev, next
 
-@nb.njit
+@nb.njit(cache=True)
 def production(par,ini,ss,w,TFP,px,delta,Vj,errors_Vj):
 
     # a. fixed
@@ -18,7 +18,7 @@ def production(par,ini,ss,w,TFP,px,delta,Vj,errors_Vj):
     cont_Vj = (1-delta_plus)*par.beta_firm*Vj_plus
     errors_Vj[:] = Vj-(px*TFP-w+cont_Vj)
 
-@nb.njit
+@nb.njit(cache=True)
 def labor_market(par,ini,ss,v,S,delta,u,theta,lambda_v,lambda_u_s,errors_u):
 
     theta[:] = v/S
@@ -29,7 +29,7 @@ def labor_market(par,ini,ss,v,S,delta,u,theta,lambda_v,lambda_u_s,errors_u):
     u_lag = lag(ini.u,u)        
     errors_u[:] = u - (u_lag-S*lambda_u_s+delta*(1-u_lag))
 
-@nb.njit
+@nb.njit(cache=True)
 def entry(par,ini,ss,Vj,lambda_v,errors_Vv):
     
     LHS = -par.kappa + lambda_v*Vj
@@ -37,7 +37,7 @@ def entry(par,ini,ss,Vj,lambda_v,errors_Vv):
 
     errors_Vv[:] = LHS-RHS
 
-@nb.njit
+@nb.njit(cache=True)
 def price_setters(par,ini,ss,px,pi,TFP,u,errors_pi):
 
     LHS = 1-par.epsilon + par.epsilon*px
@@ -53,17 +53,17 @@ def price_setters(par,ini,ss,px,pi,TFP,u,errors_pi):
 
     errors_pi[:] = LHS-RHS
 
-@nb.njit
+@nb.njit(cache=True)
 def central_bank(par,ini,ss,pi,i):
 
     i[:] = (1+ss.i)*((1+pi)/(1+ss.pi))**par.delta_pi - 1
     
-@nb.njit
+@nb.njit(cache=True)
 def dividends(par,ini,ss,TFP,u,w,div):
 
     div[:] = TFP*(1-u) - w*(1-u)
 
-@nb.njit
+@nb.njit(cache=True)
 def financial_market(par,ini,ss,pi,i,q,r):
 
     pi_plus = lead(pi,ss.pi)
@@ -80,7 +80,7 @@ def financial_market(par,ini,ss,pi,i,q,r):
     r[0] = (1+par.delta_q*q[0])*ini.B/ini.A_hh - 1
     r[1:] = R_plus[:-1] - 1
 
-@nb.njit
+@nb.njit(cache=True)
 def government(par,ini,ss,G,U_UI_hh_guess,w,u,q,Phi,transfer,X,taut,tau,taxes,B):
 
     # a. expenses
@@ -101,7 +101,46 @@ def government(par,ini,ss,G,U_UI_hh_guess,w,u,q,Phi,transfer,X,taut,tau,taxes,B)
         taxes[t] = tau[t]*pre_tax_hh_income[t]
         B[t] = ( (1+par.delta_q*q[t])*B_lag+X[t]-taxes[t])/q[t]
     
-@nb.njit
+@nb.njit(cache=True)
+def hh_RA(par,ini,ss,TFP,u,G,q,B,delta,lambda_u_s,u_bar,A_hh,C_hh,U_ALL_hh,U_UI_hh):
+    """ representative agent replacing the household block """
+
+    # a. consumption from ressource constraint and assets from asset market clearing
+    C_hh[:] = TFP*(1-u)-G
+    A_hh[:] = q*B
+
+    # b. unemployment duration distribution (independent of assets)
+    Dz_lag = par.Dz_ss.copy()
+    Dz = np.zeros(par.Nz)
+
+    for t in range(par.T):
+
+        # i. transition
+        Dz[:] = 0.0
+        for i_z_lag in range(par.Nz):
+
+            if par.i_u_hh[0,i_z_lag] == 0: # working last period
+                p = 1.0-delta[t]
+            else: # unemployed last period
+                p = lambda_u_s[t]
+
+            p = np.fmax(np.fmin(p,1.0),0.0)
+
+            Dz[0] += p*Dz_lag[i_z_lag]
+            Dz[par.i_z_next[i_z_lag]] += (1-p)*Dz_lag[i_z_lag]
+
+        # ii. aggregates
+        U_ALL_hh[t] = 0.0
+        U_UI_hh[t] = 0.0
+        for i_z in range(1,par.Nz):
+
+            i_u = par.i_u_hh[0,i_z]
+            U_ALL_hh[t] += Dz[i_z]
+            U_UI_hh[t] += np.fmax(np.fmin(u_bar[t]-(i_u-1),1.0),0.0)*Dz[i_z]
+
+        Dz_lag[:] = Dz
+
+@nb.njit(cache=True)
 def market_clearing(par,ini,ss,G,TFP,pi,i,C_hh,u,q,B,U_ALL_hh,U_UI_hh_guess,U_UI_hh,
                     Y,clearing_Y,qB,A_hh,r,errors_assets,errors_U,errors_U_UI):
 
@@ -126,7 +165,7 @@ def market_clearing(par,ini,ss,G,TFP,pi,i,C_hh,u,q,B,U_ALL_hh,U_UI_hh_guess,U_UI
     errors_U[:] = u-U_ALL_hh
     errors_U_UI[:] = U_UI_hh_guess-U_UI_hh
 
-@nb.njit
+@nb.njit(cache=True)
 def ann(par,ini,ss,i,r,pi,i_ann,r_ann,pi_ann):
 
     for t in range(par.T):
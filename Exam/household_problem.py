@@ -1,84 +1,71 @@
 import numpy as np
 import numba as nb
 
-from consav.linear_interp import interp_1d_vec
+from hetools import egm
 
-@nb.njit
+@nb.njit(parallel=True,cache=True)
 def solve_hh_backwards(par,z_trans,
     delta,lambda_u_s,w,r,tau,div,transfer,
     vbeg_a_plus,vbeg_a,a,c,u_ALL,u_UI,u_bar,ss=False):
 
     s = np.zeros_like(a)
+    v_a = np.zeros_like(c)
     
-    # a. solution step
-    for i_fix in range(par.Nfix):
-        for i_z in range(par.Nz):
-            
-            i_u = par.i_u_hh[i_fix,i_z] # unemployment indicator
-
-            # i. income
-            if i_u == 0:
-                u_UI_ = 0.0
-                yt = w
-                u_ALL[i_fix,i_z,:] = 0.0
-            else:
-                u_UI_ = np.fmax(np.fmin(u_bar-(i_u-1),1.0),0.0)
-                yt = (u_UI_*par.phi_obar + (1-u_UI_)*par.phi_ubar)*w
-                u_ALL[i_fix,i_z,:] = 1.0
-
-            u_UI[i_fix,i_z,:] = u_UI_
+    # a. solution step (parallel over all combinations of i_fix and i_z)
+    for i_fix_z in nb.prange(par.Nfix*par.Nz):
 
-            # ii. income after tax
-            y = (1-tau)*yt + div + transfer
-
-            # iii. EGM
-            m = (1+r)*par.a_grid + y
-
-            # iv. consumption-saving
-            if i_fix == 0:
+        i_fix = i_fix_z // par.Nz
+        i_z = i_fix_z % par.Nz
         
-                a[i_fix,i_z,:] = 0.0
-                c[i_fix,i_z,:] = m
+        i_u = par.i_u_hh[i_fix,i_z] # unemployment indicator
 
-            elif ss:
+        # i. income
+        if i_u == 0:
+            u_UI_ = 0.0
+            yt = w
+            u_ALL[i_fix,i_z,:] = 0.0
+        else:
+            u_UI_ = np.fmax(np.fmin(u_bar-(i_u-1),1.0),0.0)
+            yt = (u_UI_*par.phi_obar + (1-u_UI_)*par.phi_ubar)*w
+            u_ALL[i_fix,i_z,:] = 1.0
 
-                c[i_fix,i_z,:] = 0.9*m
-                a[i_fix,i_z,:] = m-c[i_fix,i_z,:]
+        u_UI[i_fix,i_z,:] = u_UI_
 
-            else:
+        # ii. income after tax
+        y = (1-tau)*yt + div + transfer
+
+        # iii. consumption-saving
+        if par.is_HtM[i_fix]: # closed form at the point mass a_lag = 0 (the grid points above are never reached)
+    
+            a[i_fix,i_z,:] = 0.0
+            c[i_fix,i_z,:] = (1+r)*par.a_grid[0] + y
 
-                # o. EGM
-                c_endo = (par.beta_grid[i_fix]*vbeg_a_plus[i_fix,i_z])**(-1/par.sigma)
-                m_endo = c_endo + par.a_grid
+        elif ss:
 
-                # oo. interpolation to fixed grid
-                interp_1d_vec(m_endo,par.a_grid,m,a[i_fix,i_z])
+            for i_a in range(par.Na):
+                c[i_fix,i_z,i_a] = 0.9*((1+r)*par.a_grid[i_a] + y)
+                a[i_fix,i_z,i_a] = (1+r)*par.a_grid[i_a] + y - c[i_fix,i_z,i_a]
+                v_a[i_fix,i_z,i_a] = (1+r)*c[i_fix,i_z,i_a]**(-par.sigma)
 
-                # ooo. enforce borrowing constraint
-                a[i_fix,i_z,:] = np.fmax(a[i_fix,i_z,:],0.0)
+        else: # EGM (incl. borrowing constraint and marginal value of cash-on-hand)
 
-                # oooo. implied consumption and value
-                c[i_fix,i_z] = m-a[i_fix,i_z]
+            egm.egm(par.a_grid,vbeg_a_plus[i_fix,i_z],par.beta_grid[i_fix],par.sigma,1+r,y,a[i_fix,i_z],c[i_fix,i_z],v_a[i_fix,i_z])
 
     # b. update transition matrix
+    z_trans_0 = alloc_z_trans_0(par)
+
     fill_s(par,s)
-    fill_z_trans(par,z_trans,delta,lambda_u_s,s)
+    fill_z_trans_0(par,z_trans_0,delta,lambda_u_s,s)
+    fill_z_trans_from_0(par,z_trans,z_trans_0)
 
     # c. expectation step
-    v_a = (1+r)*c**(-par.sigma)
-    
-    for i_fix in range(par.Nfix):
-        for i_z_lag in range(par.Nz):
-            
-            vbeg_a[i_fix,i_z_lag,:] = 0.0
-            for i_z in range(par.Nz):
-                vbeg_a[i_fix,i_z_lag,:] += z_trans[i_fix,:,i_z_lag,i_z]*v_a[i_fix,i_z,:]
+    expectation_sparse(par,z_trans_0,v_a,vbeg_a)
 
 #####################
 # transition matrix #
 #####################
 
-@nb.njit
+@nb.njit(cache=True)
 def fill_s(par,s):
     """ fill search intensity """
 
@@ -88,37 +75,159 @@ def fill_s(par,s):
         for i_z_lag in range(1,par.Nz): 
             s[i_fix,i_z_lag,:] = 1.0
 
-@nb.njit
+@nb.njit(cache=True)
 def fill_z_trans(par,z_trans,delta,lambda_u_s,s):
     """ transition matrix for z """
     
+    z_trans_0 = alloc_z_trans_0(par)
+    fill_z_trans_0(par,z_trans_0,delta,lambda_u_s,s)
+    fill_z_trans_from_0(par,z_trans,z_trans_0)
+
+############################
+# sparse transition matrix #
+############################
+
+# each row of the transition matrix has at most two non-zero elements:
+#  i_z = 0 (employed) with probability z_trans_0[i_fix,i_a,i_z_lag]
+#  i_z = par.i_z_next[i_z_lag] (separation or one month longer unemployed) with probability 1-z_trans_0[i_fix,i_a,i_z_lag]
+# if not par.full_z_trans the search intensity does not depend on assets and the asset dimension has length one
+# HtM households always have a = 0 and are represented by a point mass at the first grid point
+
+@nb.njit(cache=True)
+def alloc_z_trans_0(par):
+    """ allocate probability of being employed next period """
+
+    Na_z = par.Na if par.full_z_trans else 1
+    return np.zeros((par.Nfix,Na_z,par.Nz))
+
+@nb.njit(cache=True)
+def fill_z_trans_0(par,z_trans_0,delta,lambda_u_s,s):
+    """ probability of being employed next period """
+
     for i_fix in range(par.Nfix):
-        for i_a in range(par.Na):
+        for i_a in range(z_trans_0.shape[1]):
+            for i_z_lag in range(par.Nz):
+
+                i_u_lag = par.i_u_hh[i_fix,i_z_lag]
+
+                if i_u_lag == 0: # working last period
+                    z_trans_0_ = 1.0-delta
+                else: # unemployed last period
+                    z_trans_0_ = lambda_u_s*s[i_fix,i_z_lag,i_a]
+
+                z_trans_0_ = np.fmin(z_trans_0_,1.0)
+                z_trans_0_ = np.fmax(z_trans_0_,0.0)
+
+                z_trans_0[i_fix,i_a,i_z_lag] = z_trans_0_
+
+@nb.njit(cache=True)
+def fill_z_trans_from_0(par,z_trans,z_trans_0):
+    """ dense transition matrix from the sparse representation (each element is set once, i_z_next > 0) """
+
+    if z_trans.ndim == 4: # Nfix x Na x Nz x Nz
+        assert z_trans_0.shape[1] == z_trans.shape[1], 'z_trans_0 must have an asset dimension when z_trans has (par.full_z_trans)'
+    else: # Nfix x Nz x Nz
+        assert z_trans_0.shape[1] == 1, 'z_trans_0 must not have an asset dimension when z_trans has not (par.full_z_trans)'
+
+    z_trans[:] = 0.0
+
+    for i_fix in range(par.Nfix):
+        for i_a in range(z_trans_0.shape[1]):
             for i_z_lag in range(par.Nz):
-                for i_z in range(par.Nz):
-                            
-                    i_u_lag = par.i_u_hh[i_fix,i_z_lag] 
-                    i_u = par.i_u_hh[i_fix,i_z] 
-
-                    if i_u_lag == 0: # working last period
-                        
-                        if i_u == 0:
-                            z_trans_ = 1.0-delta
-                        elif i_u == 1:
-                            z_trans_ = delta
-                        else:
-                            z_trans_ = 0.0
-                    
-                    else: # unemployed last
-
-                        if i_u == 0:
-                            z_trans_ = lambda_u_s*s[i_fix,i_z_lag,i_a]
-                        elif (i_u == i_u_lag+1) or (i_u == i_u_lag == par.Nu):
-                            z_trans_ = 1.0-lambda_u_s*s[i_fix,i_z_lag,i_a]
-                        else:
-                            z_trans_ = 0.0
-
-                    z_trans_ = np.fmin(z_trans_,1.0)
-                    z_trans_ = np.fmax(z_trans_,0.0)
-
-                    z_trans[i_fix,i_a,i_z_lag,i_z] = z_trans_
\ No newline at end of file
+
+                i_z_next = par.i_z_next[i_z_lag]
+                p = z_trans_0[i_fix,i_a,i_z_lag]
+
+                if z_trans.ndim == 4:
+                    z_trans[i_fix,i_a,i_z_lag,0] = p
+                    z_trans[i_fix,i_a,i_z_lag,i_z_next] = 1.0-p
+                else:
+                    z_trans[i_fix,i_z_lag,0] = p
+                    z_trans[i_fix,i_z_lag,i_z_next] = 1.0-p
+
+@nb.njit(parallel=True,cache=True)
+def expectation_sparse(par,z_trans_0,v_a,vbeg_a):
+    """ expectation step with the sparse transition matrix """
+
+    for i_fix_z_lag in nb.prange(par.Nfix*par.Nz):
+
+        i_fix = i_fix_z_lag // par.Nz
+        i_z_lag = i_fix_z_lag % par.Nz
+
+        if par.is_HtM[i_fix]: # not used
+            vbeg_a[i_fix,i_z_lag] = 0.0
+            continue
+
+        i_z_next = par.i_z_next[i_z_lag]
+
+        for i_a in range(par.Na):
+            p = z_trans_0[i_fix,i_a if par.full_z_trans else 0,i_z_lag]
+            vbeg_a[i_fix,i_z_lag,i_a] = p*v_a[i_fix,0,i_a] + (1-p)*v_a[i_fix,i_z_next,i_a]
+
+######################
+# forward simulation #
+######################
+
+@nb.njit(cache=True)
+def fill_z_trans_0_path(par,z_trans_0,delta,lambda_u_s,s):
+    """ probability of being employed next period along the path """
+
+    for t in range(par.T):
+        fill_z_trans_0(par,z_trans_0[t],delta[t],lambda_u_s[t],s)
+
+@nb.njit(cache=True)
+def simulate_forwards_exo_sparse(par,z_trans_0,Dbeg,D):
+    """ forward distribution update over z with the sparse transition matrix """
+
+    D[:] = 0.0
+
+    for i_fix in range(par.Nfix):
+        for i_z_lag in range(par.Nz):
+
+            i_z_next = par.i_z_next[i_z_lag]
+
+            for i_a in range(1 if par.is_HtM[i_fix] else par.Na): # point mass for HtM
+                p = z_trans_0[i_fix,i_a if par.full_z_trans else 0,i_z_lag]
+                D[i_fix,0,i_a] += p*Dbeg[i_fix,i_z_lag,i_a]
+                D[i_fix,i_z_next,i_a] += (1-p)*Dbeg[i_fix,i_z_lag,i_a]
+
+@nb.njit(cache=True)
+def simulate_forwards_endo(par,i,w,D,Dbeg_plus):
+    """ forward distribution update over a with the linear lottery (left grid point i with weight w) """
+
+    Dbeg_plus[:] = 0.0
+
+    for i_fix in range(par.Nfix):
+        for i_z in range(par.Nz):
+            for i_a in range(1 if par.is_HtM[i_fix] else par.Na): # point mass for HtM (a = 0 -> i = 0 and w = 1)
+                i_ = i[i_fix,i_z,i_a]
+                Dbeg_plus[i_fix,i_z,i_] += w[i_fix,i_z,i_a]*D[i_fix,i_z,i_a]
+                Dbeg_plus[i_fix,i_z,i_+1] += (1-w[i_fix,i_z,i_a])*D[i_fix,i_z,i_a]
+
+@nb.njit(cache=True)
+def find_Dbeg_sparse(par,z_trans_0,i,w,Dbeg,D):
+    """ iterate Dbeg forwards to convergence (Dbeg and D are updated), returns the number of iterations """
+
+    Dbeg_plus = np.zeros_like(Dbeg)
+
+    for it in range(1,par.max_iter_simulate+1):
+
+        simulate_forwards_exo_sparse(par,z_trans_0,Dbeg,D)
+        simulate_forwards_endo(par,i,w,D,Dbeg_plus)
+
+        max_abs_diff = np.max(np.abs(Dbeg_plus-Dbeg))
+        Dbeg[:] = Dbeg_plus
+
+        if max_abs_diff < par.tol_simulate: return it
+
+    raise ValueError('find_Dbeg_sparse: too many iterations')
+
+@nb.njit(cache=True)
+def simulate_path_sparse(par,z_trans_0,i,w,Dbeg_ini,Dbeg,D):
+    """ simulate the distribution along the path from Dbeg_ini """
+
+    Dbeg[0] = Dbeg_ini
+
+    for t in range(par.T):
+        simulate_forwards_exo_sparse(par,z_trans_0[t],Dbeg[t],D[t])
+        if t < par.T-1: simulate_forwards_endo(par,i[t],w[t],D[t],Dbeg[t+1])
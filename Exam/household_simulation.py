@@ -0,0 +1,103 @@
+import time
+import numpy as np
+
+from EconModel import jit
+from GEModelTools import GEModelClass
+
+from consav.misc import elapsed
+
+import household_problem
+from hetools import stationary_distribution
+
+# forward simulation with the sparse z transition (kernels in household_problem.py):
+#  the distribution is updated over z with z_trans_0 and over a with the linear lottery of the savings policy,
+#  the steady state distribution is iterated to convergence here and GEModelTools' simulate_hh_ss is then
+#  started from it (one dense step which verifies it and computes the aggregates),
+#  the path is simulated here entirely (ini.Dbeg -> path.Dbeg and path.D) and the aggregates are computed here
+#
+# the dense z_trans is still filled in solve_hh_backwards as GEModelTools uses it for the Jacobians
+#
+# HtM households have a = 0 and are simulated as a point mass at the first grid point,
+# so their initial distribution must not have mass above it (checked)
+
+def check_HtM_point_mass(par,Dbeg):
+    """ raise if HtM households have mass above the first grid point """
+
+    if np.any(Dbeg[...,par.is_HtM,:,1:] > 0.0):
+        raise ValueError('HtM households must have all mass at the first grid point (a = 0)')
+
+def simulate_hh_ss(model,do_print=False,Dbeg=None,**kwargs):
+    """ simulate household problem in steady state with the sparse z transition (stationary distribution solved directly if par.direct_D) """
+
+    t0 = time.time()
+
+    par = model.par
+    ss = model.ss
+
+    Dbeg = ss.Dbeg.copy() if Dbeg is None else Dbeg.copy()
+    check_HtM_point_mass(par,Dbeg)
+
+    # a. stationary distribution
+    if par.direct_D:
+
+        Dbeg = stationary_distribution.find_Dbeg_direct(model)
+        if do_print: print(f'stationary distribution solved directly in {elapsed(t0)}')
+
+    else:
+
+        z_trans_0 = household_problem.alloc_z_trans_0(par)
+        s = np.zeros(ss.a.shape)
+        i,w = stationary_distribution.lottery(par.a_grid,ss.a)
+        D = np.zeros(Dbeg.shape)
+
+        with jit(model) as model_jit:
+
+            par_jit = model_jit.par
+
+            household_problem.fill_s(par_jit,s)
+            household_problem.fill_z_trans_0(par_jit,z_trans_0,ss.delta,ss.lambda_u_s,s)
+            it = household_problem.find_Dbeg_sparse(par_jit,z_trans_0,i,w,Dbeg,D)
+
+        if do_print: print(f'stationary distribution iterated with sparse z transition in {elapsed(t0)} [{it} iterations]')
+
+    # b. verification and aggregates
+    GEModelClass.simulate_hh_ss(model,do_print=do_print,Dbeg=Dbeg,**kwargs)
+
+def simulate_hh_path(model,do_print=False,Dbeg=None,**kwargs):
+    """ simulate household problem along the transition path with the sparse z transition (from ini.Dbeg if Dbeg is None) """
+
+    t0 = time.time()
+
+    par = model.par
+    ini = model.ini
+    path = model.path
+
+    if Dbeg is None: Dbeg = ini.Dbeg
+    check_HtM_point_mass(par,Dbeg)
+
+    # a. distribution
+    z_trans_0 = np.zeros((par.T,)+household_problem.alloc_z_trans_0(par).shape)
+    s = np.zeros(path.a.shape[1:])
+    i,w = stationary_distribution.lottery(par.a_grid,path.a)
+
+    delta = np.ascontiguousarray(path.delta.ravel()[:par.T])
+    lambda_u_s = np.ascontiguousarray(path.lambda_u_s.ravel()[:par.T])
+
+    with jit(model) as model_jit:
+
+        par_jit = model_jit.par
+
+        household_problem.fill_s(par_jit,s)
+        household_problem.fill_z_trans_0_path(par_jit,z_trans_0,delta,lambda_u_s,s)
+        household_problem.simulate_path_sparse(par_jit,z_trans_0,i,w,Dbeg,path.Dbeg,path.D)
+
+    # b. aggregates
+    for outputname in model.outputs_hh:
+
+        Outputname_hh = f'{outputname.upper()}_hh'
+        X_hh = path.__dict__[Outputname_hh]
+
+        value = np.sum(path.__dict__[outputname]*path.D,axis=tuple(range(1,path.D.ndim)))
+        X_hh[:] = value.reshape((par.T,)+(1,)*(X_hh.ndim-1))
+
+    if do_print: print(f'household problem simulated along transition with sparse z transition in {elapsed(t0)}')
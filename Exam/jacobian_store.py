@@ -0,0 +1,153 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import numpy as np
+
+from consav.misc import elapsed
+
+# the Jacobians computed by compute_jacs
+JAC_ATTRS = ['jac_hh','jac','H_U','H_Z']
+
+def fingerprint(model,**kwargs):
+    """ hash of par, ss, the DAG and the compute_jacs arguments """
+
+    h = hashlib.sha1()
+
+    def update(key,value):
+
+        h.update(key.encode())
+        if type(value) is np.ndarray:
+            h.update(str((value.dtype,value.shape)).encode())
+            h.update(np.ascontiguousarray(value).tobytes())
+        else:
+            h.update(repr(value.item() if isinstance(value,np.generic) else value).encode())
+
+    # a. model structure
+    update('class',type(model).__name__)
+    for attr in ['blocks','shocks','unknowns','targets','inputs_hh','inputs_hh_z','outputs_hh']:
+        update(attr,list(getattr(model,attr)))
+
+    update('kwargs',sorted(kwargs.items()))
+
+    # b. par and ss
+    for ns in ['par','ss']:
+        namespace = getattr(model,ns)
+        for key in sorted(namespace.__dict__.keys()):
+            value = namespace.__dict__[key]
+            if type(value) is np.ndarray or np.isscalar(value): update(f'{ns}.{key}',value)
+
+    return h.hexdigest()
+
+class JacobianStore():
+    """ on-disk store of Jacobians with one folder per fingerprint """
+
+    def __init__(self,path='jacs',mmap_mode='c'):
+        """ mmap_mode is passed to np.load ('c': copy-on-write memory map, None: load into memory) """
+
+        self.path = path
+        self.mmap_mode = mmap_mode
+
+    def folder(self,key):
+
+        return os.path.join(self.path,key)
+
+    def __contains__(self,key):
+
+        return os.path.isfile(os.path.join(self.folder(key),'index.json'))
+
+    def save(self,model,key):
+        """ save the Jacobians of model (atomic: written to a temporary folder which is then renamed) """
+
+        if key in self: return
+
+        os.makedirs(self.path,exist_ok=True)
+        tmpfolder = tempfile.mkdtemp(dir=self.path,prefix=f'.{key}_')
+
+        try:
+
+            # a. arrays
+            index = {}
+            for attr in JAC_ATTRS:
+
+                value = getattr(model,attr,None)
+
+                if type(value) is np.ndarray:
+
+                    np.save(os.path.join(tmpfolder,f'{attr}.npy'),value)
+                    index[attr] = f'{attr}.npy'
+
+                elif type(value) is dict:
+
+                    index[attr] = []
+                    for i,(jackey,jac) in enumerate(value.items()):
+                        if not type(jac) is np.ndarray: continue
+                        filename = f'{attr}_{i}.npy'
+                        np.save(os.path.join(tmpfolder,filename),jac)
+                        index[attr].append([list(jackey) if type(jackey) is tuple else jackey,filename])
+
+            # b. index (written last)
+            with open(os.path.join(tmpfolder,'index.json'),'w') as f:
+                json.dump(index,f)
+
+            # c. rename
+            os.rename(tmpfolder,self.folder(key))
+
+        except OSError:
+
+            # another process saved the same key first
+            shutil.rmtree(tmpfolder,ignore_errors=True)
+            if not key in self: raise
+
+    def _load(self,filename):
+        """ load array (a memory map is viewed as a plain array as for EconModel's type checks, pickling and copy()) """
+
+        return np.load(filename,mmap_mode=self.mmap_mode).view(np.ndarray)
+
+    def load(self,model,key):
+        """ load the Jacobians into model, returns False if not stored """
+
+        if not key in self: return False
+
+        folder = self.folder(key)
+        with open(os.path.join(folder,'index.json')) as f:
+            index = json.load(f)
+
+        for attr,value in index.items():
+
+            if type(value) is str:
+                setattr(model,attr,self._load(os.path.join(folder,value)))
+            else:
+                jacs = getattr(model,attr,None)
+                if jacs is None:
+                    jacs = {}
+                    setattr(model,attr,jacs)
+                for jackey,filename in value:
+                    jackey = tuple(jackey) if type(jackey) is list else jackey
+                    jacs[jackey] = self._load(os.path.join(folder,filename))
+
+        return True
+
+    def clear(self):
+        """ remove all stored Jacobians """
+
+        shutil.rmtree(self.path,ignore_errors=True)
+
+def compute_jacs_cached(model,store=None,do_print=False,**kwargs):
+    """ load the Jacobians from store if par, ss and the DAG are unchanged, otherwise compute and save them """
+
+    t0 = time.time()
+
+    if store is None: store = JacobianStore()
+    key = fingerprint(model,**kwargs)
+
+    if store.load(model,key):
+        if do_print: print(f'Jacobians loaded from {store.folder(key)} in {elapsed(t0)}')
+    else:
+        model.compute_jacs(do_print=do_print,**kwargs)
+        store.save(model,key)
+        if do_print: print(f'Jacobians saved to {store.folder(key)} in {elapsed(t0)}')
+
+    return key
@@ -1,4 +1,5 @@
 import time
+from functools import lru_cache
 import numpy as np
 
 from EconModel import jit
@@ -8,6 +9,7 @@ from consav.markov import find_ergodic
 from consav.misc import elapsed
 
 import household_problem
+from hetools import household_ss
 
 def set_z_trans_ss(model):
     """ set z_trans """
@@ -22,9 +24,12 @@ def set_z_trans_ss(model):
 def get_Dz(model):
     """ get distribution for z """
 
+    par = model.par
     ss = model.ss
 
-    return find_ergodic(ss.z_trans[0,0])
+    z_trans = ss.z_trans[0,0] if par.full_z_trans else ss.z_trans[0]
+
+    return find_ergodic(z_trans)
 
 def set_Dbeg_ss(model):
     """ set initial distribution """
@@ -80,17 +85,20 @@ def prepare_hh_ss(model):
 
     model.set_hh_initial_guess()
 
-def find_ss(model,do_print=False,fix_RealR=False):
-    """ find the steady state"""
+def find_ss(model,do_print=False,fix_RealR=False,model_HANK=None):
+    """ find the steady state (model_HANK: solved HANK model with the same parameters giving the assets in RA mode, otherwise par.A_hh_RA) """
 
     par = model.par
     ss = model.ss
 
     t0 = time.time()
     
-    # a. SAM and HANK
+    # a. SAM and HANK (or RA)
     find_ss_SAM(model,do_print=do_print)
-    find_ss_HANK(model,do_print=do_print)
+    if par.RA:
+        find_ss_RA(model,model_HANK=model_HANK,do_print=do_print)
+    else:
+        find_ss_HANK(model,do_print=do_print)
 
     # c. zero errors
     ss.errors_Vj = 0.0
@@ -171,7 +179,7 @@ def find_ss_HANK(model,do_print=False):
     ss.transfer = -ss.div
     
     # c. households
-    model.solve_hh_ss(do_print=do_print)
+    household_ss.solve_hh_ss(model,do_print=do_print) # solver in par.hh_solver
     model.simulate_hh_ss(do_print=do_print)
 
     # checks
@@ -181,7 +189,59 @@ def find_ss_HANK(model,do_print=False):
     assert np.isclose(ss.U_ALL_hh,ss.u)
     assert ss.U_UI_hh <= ss.u
 
-    # d. government
+    # d. government and goods market
+    find_ss_government(model,do_print=do_print)
+
+def find_ss_RA(model,model_HANK=None,do_print=False):
+    """ find the steady state - representative agent """
+
+    par = model.par
+    ss = model.ss
+
+    # a. assets from the HANK steady state or par.A_hh_RA (not determined with beta_RA = 1/(1+r))
+    if model_HANK is not None:
+        par.A_hh_RA = model_HANK.ss.A_hh
+    elif np.isnan(par.A_hh_RA):
+        raise ValueError('assets are not determined in RA mode, use find_ss(model_HANK=...) with a solved HANK model or set par.A_hh_RA')
+
+    # b. fixed
+    ss.pi = 0.0
+    ss.r = par.r_ss
+    ss.i = (1+ss.r)*(1+ss.pi)-1
+    ss.taut = ss.tau = par.tau_ss
+    ss.transfer = -ss.div
+    
+    # c. households
+    ss.A_hh = par.A_hh_RA
+
+    z_trans = np.zeros((par.Nfix,par.Na,par.Nz,par.Nz) if par.full_z_trans else (par.Nfix,par.Nz,par.Nz))
+    s = np.zeros((par.Nfix,par.Nz,par.Na))
+    with jit(model) as model_jit:
+        household_problem.fill_s(model_jit.par,s)
+        household_problem.fill_z_trans(model_jit.par,z_trans,ss.delta,ss.lambda_u_s,s)
+
+    par.Dz_ss[:] = find_ergodic(z_trans[0,0] if par.full_z_trans else z_trans[0]) # independent of assets
+
+    i_u = par.i_u_hh[0]
+    u_UI = np.fmax(np.fmin(ss.u_bar-(i_u-1),1.0),0.0)
+    ss.U_ALL_hh = np.sum(par.Dz_ss[1:])
+    ss.U_UI_hh = np.sum(u_UI[1:]*par.Dz_ss[1:])
+
+    assert np.isclose(ss.U_ALL_hh,ss.u)
+
+    # d. government and goods market
+    find_ss_government(model,do_print=do_print)
+
+    ss.C_hh = ss.Y-ss.G
+    ss.clearing_Y = 0.0 # from using ressource constraint
+
+def find_ss_government(model,do_print=False):
+    """ find the steady state - government and goods market given households """
+
+    par = model.par
+    ss = model.ss
+
+    # a. government
     ss.U_UI_hh_guess = ss.U_UI_hh
 
     ss.qB = ss.A_hh
@@ -193,14 +253,14 @@ def find_ss_HANK(model,do_print=False):
     ss.G = ss.taxes - expenses_no_G
     ss.X = ss.Phi + ss.G + ss.transfer
 
-    # e. clearing_Y
+    # b. clearing_Y
     ss.Y = ss.TFP*(1-ss.u)
-    ss.clearing_Y = ss.Y - (ss.C_hh + ss.G) 
+    if not par.RA: ss.clearing_Y = ss.Y - (ss.C_hh + ss.G) 
 
-    # f. G shock
+    # c. G shock
     par.jump_G = 0.01*ss.G
 
-    # h. set par.beta_RA
+    # d. set par.beta_RA
     par.beta_RA = 1/(1+ss.r)
 
     if do_print:
@@ -209,28 +269,92 @@ def find_ss_HANK(model,do_print=False):
         print(f'{ss.clearing_Y = :6.4f}')     
         print(f'{par.jump_G = :6.4f}')
     
-    if par.RA:
-        print(f'{par.beta_RA = :6.4f}')
+        if par.RA:
+            print(f'{par.beta_RA = :6.4f}')
+
+#####################
+# fiscal multiplier #
+#####################
+
+@lru_cache(maxsize=None)
+def discount_vector(r,T):
+    """ discount factors (1+r)**(-t) for t = 0,...,T-1 (cached and read-only) """
+
+    discount = (1+r)**(-np.arange(T,dtype=float))
+    discount.flags.writeable = False
+
+    return discount
+
+def check_T(models):
+    """ common length of the paths of models """
+
+    Ts = {model_.par.T for model_ in models}
+    if len(Ts) > 1: raise ValueError(f'models must have the same par.T, got {sorted(Ts)}')
+
+    return Ts.pop()
+
+def deviations(models,varnames):
+    """ deviations from steady state, Nmodels x Nvarnames x T """
+
+    T = check_T(models)
+    dev = np.zeros((len(models),len(varnames),T))
+
+    for i_model,model_ in enumerate(models):
+        for i_varname,varname in enumerate(varnames):
+            dev[i_model,i_varname] = model_.path.__dict__[varname].ravel()[:T]-model_.ss.__dict__[varname]
+
+    return dev
+
+def fiscal_multipliers(models,noms=('Y','C_hh'),denoms=('taxes','G'),labels=None,areas=(),do_print=False):
+    """ cumulative and impact multipliers for all models and all nominator/denominator pairs """
+
+    if labels is None: labels = [model_.name for model_ in models]
+
+    # a. deviations and present values
+    varnames = list(dict.fromkeys([*noms,*denoms,*areas]))
+    dev = deviations(models,varnames)
+
+    T = check_T(models)
+    discount = np.array([discount_vector(float(model_.ss.r),T) for model_ in models])
+    PV = np.einsum('mvt,mt->mv',dev,discount)
+    
+    # b. table
+    table = {'label':list(labels)}
+
+    for nom in noms:
+        for denom in denoms:
+            i_nom = varnames.index(nom)
+            i_denom = varnames.index(denom)
+            table[f'{nom}/{denom}'] = PV[:,i_nom]/PV[:,i_denom]
+            table[f'{nom}/{denom} (impact)'] = dev[:,i_nom,0]/dev[:,i_denom,0]
+
+    for varname in varnames:
+        table[f'PV {varname}'] = PV[:,varnames.index(varname)]
+
+    for varname in areas:
+        table[f'area {varname}'] = dev[:,varnames.index(varname)].sum(axis=1)
+
+    # c. print
+    if do_print:
+        for i_model,label in enumerate(table['label']):
+            values = ', '.join([f'{key} = {value[i_model]:6.4f}' for key,value in table.items() if not key == 'label'])
+            print(f'{label}: {values}')
+
+    return table
 
 def fiscal_multiplier(model,nom='Y',denom='taxes',print_frac=False):
-    par = model.par
-    ss = model.ss
     
-    if nom == 'Y':
-        nominator = np.sum([((model.path.Y[t]-ss.Y)/(1+ss.r)**t) for t in range(par.T)])
-    elif nom == 'C_hh':
-        nominator = np.sum([((model.path.C_hh[t]-ss.C_hh)/(1+ss.r)**t) for t in range(par.T)])
-    else:
-        return ValueError('nominator must be Y or C_hh')
+    if not nom in ['Y','C_hh']:
+        raise ValueError('nominator must be Y or C_hh')
 
-    if denom == 'taxes':
-        denominator = np.sum([((model.path.taxes[t]-ss.taxes)/(1+ss.r)**t) for t in range(par.T)])
-    elif denom == 'G':
-        denominator = np.sum([((model.path.G[t]-ss.G)/(1+ss.r)**t) for t in range(par.T)])
-    else:
-        return ValueError('denominator must be taxes or G')
+    if not denom in ['taxes','G']:
+        raise ValueError('denominator must be taxes or G')
+
+    table = fiscal_multipliers([model],noms=(nom,),denoms=(denom,))
 
-    multiplier = nominator/denominator
+    nominator = table[f'PV {nom}'][0]
+    denominator = table[f'PV {denom}'][0]
+    multiplier = table[f'{nom}/{denom}'][0]
 
     if print_frac:
         print(f'{nominator = :6.8f}')
@@ -0,0 +1,202 @@
+import numpy as np
+
+# compressed household Jacobians:
+#  the fake news algorithm gives J[t,s] = J[t-1,s-1] + F[t,s] with J[0,s] = F[0,s] and J[t,0] = F[t,0],
+#  where the fake news matrix F is only non-zero (up to tol) in its upper left H x H corner,
+#  then J[t,s] = j[t-s] (a Toeplitz matrix with band |t-s| < H) except in the upper left H x H corner,
+#  the corner correction decays as the fake news matrix and is stored as its truncated SVD with k columns,
+#  so J is stored as 2H-1 diagonals and 2*H*k numbers for the corner instead of T x T
+
+class ToeplitzJacobian():
+    """ T x T Jacobian stored as a banded Toeplitz matrix plus a low-rank correction of the upper left corner """
+
+    __array_ufunc__ = None # numpy defers X @ J and X + J to this class
+
+    def __init__(self,diags,corner_U,corner_V,T,error=np.nan):
+        """ diags[H-1+d] is the value on diagonal d = t-s, the corner correction is corner_U @ corner_V (H x k and k x H) """
+
+        self.diags = diags
+        self.corner_U = corner_U
+        self.corner_V = corner_V
+        self.T = T
+        self.error = error # max abs. difference to the dense Jacobian it was created from
+
+    @classmethod
+    def from_dense(cls,J,tol=1e-10):
+        """ compress the dense Jacobian J, fake news entries below tol*max|J| outside the corner are dropped """
+
+        T = J.shape[0]
+
+        # a. fake news matrix
+        F = J.copy()
+        F[1:,1:] -= J[:-1,:-1]
+
+        # b. size of corner (smallest H with |F[i,j]| <= tol*max|J| for max(i,j) >= H)
+        level = np.maximum.outer(np.arange(T),np.arange(T))
+        F_max = np.zeros(T)
+        np.maximum.at(F_max,level.ravel(),np.abs(F).ravel())
+
+        I = np.flatnonzero(F_max > tol*np.max(np.abs(J)))
+        H = I[-1]+1 if I.size > 0 else 1
+
+        F = F[:H,:H]
+
+        # c. diagonals (sums of the fake news along each diagonal)
+        diags = np.array([np.trace(F,offset=-d) for d in range(-(H-1),H)])
+
+        # d. corner correction (exact Jacobian in corner minus the Toeplitz part)
+        J_corner = F.copy()
+        for t in range(1,H):
+            J_corner[t,1:] += J_corner[t-1,:-1]
+
+        corner = J_corner - diags[np.subtract.outer(np.arange(H),np.arange(H))+H-1]
+
+        # e. truncated SVD of corner (the max abs. error is at most the largest dropped singular value)
+        U,S,Vt = np.linalg.svd(corner)
+        k = np.sum(S > tol*np.max(np.abs(J)))
+
+        # f. compressed Jacobian
+        jac = cls(diags,U[:,:k]*S[:k],Vt[:k],T)
+        jac.error = np.max(np.abs(jac.to_dense()-J))
+
+        return jac
+
+    @property
+    def H(self):
+
+        return self.corner_U.shape[0]
+
+    @property
+    def k(self):
+
+        return self.corner_U.shape[1]
+
+    @property
+    def shape(self):
+
+        return (self.T,self.T)
+
+    @property
+    def nbytes(self):
+
+        return self.diags.nbytes + self.corner_U.nbytes + self.corner_V.nbytes
+
+    def to_dense(self):
+        """ dense T x T Jacobian """
+
+        T = self.T
+        H = self.H
+
+        d = np.subtract.outer(np.arange(T),np.arange(T))
+        J = np.where(np.abs(d) < H,self.diags[np.clip(d+H-1,0,2*H-2)],0.0)
+        J[:H,:H] += self.corner_U@self.corner_V
+
+        return J
+
+    def transpose(self):
+
+        return ToeplitzJacobian(self.diags[::-1].copy(),self.corner_V.T.copy(),self.corner_U.T.copy(),self.T,self.error)
+
+    ############
+    # products #
+    ############
+
+    def __matmul__(self,X):
+        """ J @ X for X with T rows (vector or matrix) """
+
+        if isinstance(X,ToeplitzJacobian): X = X.to_dense()
+
+        T = self.T
+        H = self.H
+        assert X.shape[0] == T, f'X must have {T} rows'
+
+        X_ = X.reshape((T,-1))
+        Y = np.zeros(X_.shape,dtype=np.result_type(self.diags,X))
+
+        # a. band (Y[t] = sum_s diags[H-1+t-s] X[s] is a convolution)
+        for j in range(X_.shape[1]):
+            Y[:,j] = np.convolve(X_[:,j],self.diags)[H-1:H-1+T]
+
+        # b. corner
+        Y[:H] += self.corner_U@(self.corner_V@X_[:H])
+
+        return Y.reshape(X.shape)
+
+    def __rmatmul__(self,X):
+        """ X @ J for X with T columns """
+
+        return (self.transpose()@X.T).T
+
+    ###############
+    # combination #
+    ###############
+
+    def __add__(self,other):
+
+        if not isinstance(other,ToeplitzJacobian): return self.to_dense() + other
+
+        H = max(self.H,other.H)
+
+        diags = np.zeros(2*H-1)
+        corner_U = np.zeros((H,self.k+other.k))
+        corner_V = np.zeros((self.k+other.k,H))
+
+        for jac,cols in [(self,slice(0,self.k)),(other,slice(self.k,self.k+other.k))]:
+            diags[H-jac.H:H+jac.H-1] += jac.diags
+            corner_U[:jac.H,cols] = jac.corner_U
+            corner_V[cols,:jac.H] = jac.corner_V
+
+        return ToeplitzJacobian(diags,corner_U,corner_V,self.T,self.error+other.error)
+
+    __radd__ = __add__
+
+    def __mul__(self,scalar):
+
+        return ToeplitzJacobian(scalar*self.diags,scalar*self.corner_U,self.corner_V,self.T,np.abs(scalar)*self.error)
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+
+        return -1.0*self
+
+###################
+# household block #
+###################
+
+def compress_jac_hh(model,tol=1e-10,do_print=False):
+    """ compressed versions of the household Jacobians in model.jac_hh """
+
+    jacs = {}
+    for key,J in model.jac_hh.items():
+        jacs[key] = ToeplitzJacobian.from_dense(np.asarray(J),tol=tol)
+
+    if do_print:
+
+        nbytes = sum(jac.nbytes for jac in jacs.values())
+        nbytes_dense = sum(np.asarray(J).nbytes for J in model.jac_hh.values())
+        max_error = max(jac.error for jac in jacs.values())
+        max_H = max(jac.H for jac in jacs.values())
+        max_k = max(jac.k for jac in jacs.values())
+
+        print(f'household Jacobians compressed from {nbytes_dense/2**20:.1f} MB to {nbytes/2**20:.1f} MB [max H = {max_H}, max k = {max_k}, max abs. error = {max_error:.1e}]')
+
+    return jacs
+
+def IRF_hh(model,jacs,IRF=None):
+    """ linear impulse responses of the household outputs from the compressed Jacobians and the impulse responses of the inputs (default: model.IRF) """
+
+    par = model.par
+
+    if IRF is None: IRF = model.IRF
+
+    IRF_hh = {}
+    for (outputname,inputname),jac in jacs.items():
+
+        if not inputname in IRF: continue
+
+        dinput = np.asarray(IRF[inputname]).ravel()[:par.T]
+        if not outputname in IRF_hh: IRF_hh[outputname] = np.zeros(par.T)
+        IRF_hh[outputname] += jac@dinput
+
+    return IRF_hh
@@ -0,0 +1,154 @@
+import time
+import hashlib
+import numpy as np
+from scipy.linalg import lu_factor, lu_solve
+
+from consav.misc import elapsed
+
+# batched transition paths:
+#  the scenarios are solved together with Broyden's (good) method starting from H_U as in find_transition_path,
+#  the LU factorization of H_U is computed once and cached (key: content of H_U, i.e. same steady state and Jacobians),
+#  the Broyden updates are applied to the inverse (Sherman-Morrison), so each iteration is an O(n^2) solve
+#  with all scenarios stacked as columns instead of a new O(n^3) solve per scenario
+#
+# the scenarios are evaluated with the same internal steps as GEModelTools' find_transition_path
+# (_set_ini, _set_shocks and _path_obj), so the path of the model is overwritten,
+# and each scenario is returned as a copy of the model made right after its converged evaluation
+
+MAX_CACHE = 4 # number of cached factorizations
+_lu_cache = {} # key -> (lu,piv)
+
+def lu_H_U(model,do_print=False):
+    """ LU factorization of model.H_U (cached) """
+
+    t0 = time.time()
+
+    H_U = np.ascontiguousarray(model.H_U)
+    key = hashlib.sha1(str(H_U.shape).encode() + H_U.tobytes()).hexdigest()
+
+    if key in _lu_cache:
+        if do_print: print('LU factorization of H_U reused from cache')
+        return _lu_cache[key]
+
+    if len(_lu_cache) >= MAX_CACHE: del _lu_cache[next(iter(_lu_cache))] # oldest
+
+    _lu_cache[key] = lu_factor(H_U)
+    if do_print: print(f'LU factorization of H_U computed in {elapsed(t0)}')
+
+    return _lu_cache[key]
+
+class InverseBroyden():
+    """ inverse Jacobian as the LU factorization plus rank one updates, B z = lu_solve(z) + sum_j a_j (w_j'z) """
+
+    def __init__(self,lu):
+
+        self.lu = lu
+        self.a = []
+        self.w = []
+
+    def apply_updates(self,x,z,trans=0):
+        """ add the rank one updates to x = lu_solve(z) """
+
+        for a,w in zip(self.a,self.w):
+            if trans == 0:
+                x += a*(w@z)
+            else:
+                x += w*(a@z)
+
+        return x
+
+    def __call__(self,z,trans=0):
+
+        return self.apply_updates(lu_solve(self.lu,z,trans=trans),z,trans=trans)
+
+    def update(self,dx,dy):
+        """ good Broyden update: B = B + (dx - B dy) dx'B / (dx'B dy) """
+
+        Bdy = self(dy)
+        w = self(dx,trans=1)
+
+        self.a.append((dx-Bdy)/(dx@Bdy))
+        self.w.append(w)
+
+def _evaluate(model,spec,x):
+    """ errors in targets for the unknowns x in scenario spec """
+
+    model._set_ini(ini_input=spec['ini'])
+    model._set_shocks(shock_specs=spec['shocks'])
+
+    return model._path_obj(x)
+
+def find_transition_paths(model,scenarios,copy='copy',do_print=False):
+    """ find transition paths for several scenarios {name:shocks or {'shocks':shocks,'ini':ini}}, returns {name:model copy}
+
+    copy is the name of the method used to copy the model ('copy' or 'copy_cow')
+
+    """
+
+    t0 = time.time()
+
+    par = model.par
+    ss = model.ss
+
+    # a. scenarios
+    specs = {}
+    for name,spec in scenarios.items():
+        if type(spec) is dict and 'shocks' in spec:
+            specs[name] = {'shocks':spec['shocks'],'ini':spec.get('ini',{})}
+        else:
+            specs[name] = {'shocks':spec,'ini':{}}
+
+    # b. factorization and initial guess (steady state)
+    lu = lu_H_U(model,do_print=do_print)
+
+    x_ss = np.concatenate([np.repeat(ss.__dict__[varname],par.T) for varname in model.unknowns])
+
+    x = {}
+    errors = {}
+    B = {}
+    results = {}
+
+    def evaluate(name):
+
+        errors[name] = np.asarray(_evaluate(model,specs[name],x[name])).ravel()
+        if np.max(np.abs(errors[name])) < par.tol_broyden:
+            results[name] = getattr(model,copy)(name=name)
+
+    for name in specs:
+        x[name] = x_ss.copy()
+        B[name] = InverseBroyden(lu)
+        evaluate(name)
+
+    # c. iterate
+    for it in range(par.max_iter_broyden):
+
+        active = [name for name in specs if not name in results]
+        if len(active) == 0: break
+
+        if do_print:
+            max_abs_error = max(np.max(np.abs(errors[name])) for name in active)
+            print(f' it = {it:3d} -> max. abs. error = {max_abs_error:8.2e} [{len(active)} scenarios]')
+
+        # i. stacked steps
+        E = np.column_stack([-errors[name] for name in active])
+        DX = lu_solve(lu,E)
+
+        # ii. update each scenario
+        for i,name in enumerate(active):
+
+            dx = B[name].apply_updates(DX[:,i],E[:,i])
+            errors_old = errors[name]
+
+            x[name] = x[name] + dx
+            evaluate(name)
+
+            if not name in results: B[name].update(dx,errors[name]-errors_old)
+
+    else:
+
+        active = [name for name in specs if not name in results]
+        if len(active) > 0: raise ValueError(f'find_transition_paths: no convergence for {active}')
+
+    if do_print: print(f'transition paths for {len(specs)} scenarios found in {elapsed(t0)}')
+
+    return results
@@ -0,0 +1,290 @@
+import os
+import io
+import sys
+import json
+import time
+import platform
+import argparse
+import resource
+import tempfile
+import importlib
+import contextlib
+import subprocess
+import tracemalloc
+import numpy as np
+
+# benchmark of the solution stages of the three models
+#  each model is run in a fresh process in its own folder (the folders have modules with the same names),
+#  cold timings are the first call of each stage in that process (including JIT compilation),
+#  warm timings are the best of repeated calls afterwards,
+#  peak memory is the traced (numpy and python) peak of a separate warm call of each stage,
+#  startup is the time to import the model and create it and the time to the end of the first find_ss
+#  (numba kernels are loaded from the cache if it exists, use --clear-cache to include compilation)
+#
+# usage:
+#  python benchmark.py --out benchmark.json                            (run and save)
+#  python benchmark.py --out new.json --baseline benchmark.json        (run and compare, exit code 1 on regression)
+
+STAGES = ['find_ss','solve_hh_ss','simulate_hh_ss','compute_jacs','find_transition_path']
+
+# a stage regresses if new > threshold*baseline (and the difference is larger than MIN_SECS or MIN_BYTES)
+THRESHOLDS = {stage:{'time_cold':1.50,'time_warm':1.25,'peak_memory':1.10} for stage in STAGES}
+THRESHOLDS['startup'] = {'time_import':1.50,'time_to_first_find_ss':1.50}
+MIN_SECS = 0.05
+MIN_BYTES = 2**20
+
+##########
+# models #
+##########
+
+def shocks_HANC(model):
+
+    dphi1 = np.zeros(model.par.T)
+    dphi1[0:9] = 0.1*model.ss.phi1
+
+    return {'dphi1':dphi1}
+
+def shocks_HANCWelfare(model):
+
+    dtau = np.zeros(model.par.T)
+    dtau[0] = 0.01
+
+    return {'dtau':dtau}
+
+MODELS = {
+    'HANC':{
+        'folder':'Assignment_I',
+        'module':'HANCModel',
+        'modelclass':'HANCModelClass',
+        'find_ss':{'method':'direct'},
+        'compute_jacs':{},
+        'shocks':shocks_HANC,
+        'find_transition_path':{},
+    },
+    'HANCWelfare':{
+        'folder':'Assignment_II',
+        'module':'HANCWelfareModel',
+        'modelclass':'HANCWelfareModelClass',
+        'find_ss':{},
+        'compute_jacs':{},
+        'shocks':shocks_HANCWelfare,
+        'find_transition_path':{},
+    },
+    'HANKSAM':{
+        'folder':'Exam',
+        'module':'HANKSAMModel',
+        'modelclass':'HANKSAMModelClass',
+        'find_ss':{},
+        'compute_jacs':{'skip_shocks':True},
+        'shocks':lambda model: ['G'],
+        'find_transition_path':{'do_end_check':False},
+    },
+}
+
+##########
+# stages #
+##########
+
+def stage_call(model,spec,stage):
+    """ setup (not timed) and call (timed) of stage """
+
+    if stage == 'find_ss':
+        return None,lambda: model.find_ss(**spec['find_ss'])
+    elif stage == 'solve_hh_ss':
+        return model.prepare_hh_ss,lambda: model.solve_hh_ss()
+    elif stage == 'simulate_hh_ss':
+        return lambda: (model.prepare_hh_ss(),model.solve_hh_ss()),lambda: model.simulate_hh_ss()
+    elif stage == 'compute_jacs':
+        return None,lambda: model.compute_jacs(**spec['compute_jacs'])
+    elif stage == 'find_transition_path':
+        return None,lambda: model.find_transition_path(shocks=spec['shocks'](model),**spec['find_transition_path'])
+    else:
+        raise ValueError(f'unknown stage {stage}')
+
+def run_stage(model,spec,stage,trace=False):
+    """ time (and possibly trace the memory of) one call of stage """
+
+    setup,call = stage_call(model,spec,stage)
+
+    # a. setup
+    if not setup is None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            setup()
+
+    # b. call
+    if trace:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        call()
+    secs = time.perf_counter()-t0
+
+    peak = tracemalloc.get_traced_memory()[1]-base if trace else None
+
+    return secs,peak
+
+def run_model(name,repeat=3,clear_cache=False):
+    """ all stages of one model, must be called in a fresh process in the model folder """
+
+    spec = MODELS[name]
+
+    if clear_cache: importlib.import_module('hetools.numba_cache').clear_cache()
+
+    # a. startup
+    t0 = time.perf_counter()
+    module = importlib.import_module(spec['module'])
+    model = getattr(module,spec['modelclass'])(name='benchmark')
+    time_import = time.perf_counter()-t0
+
+    results = {stage:{} for stage in STAGES}
+
+    # b. cold
+    for stage in STAGES:
+        results[stage]['time_cold'] = run_stage(model,spec,stage)[0]
+
+    startup = {'time_import':time_import,'time_to_first_find_ss':time_import+results['find_ss']['time_cold']}
+
+    # c. warm
+    for stage in STAGES:
+        results[stage]['time_warm'] = min(run_stage(model,spec,stage)[0] for _ in range(repeat))
+
+    # d. memory
+    tracemalloc.start()
+    for stage in STAGES:
+        results[stage]['peak_memory'] = run_stage(model,spec,stage,trace=True)[1]
+    tracemalloc.stop()
+
+    return {'startup':startup,'stages':results,'max_rss':resource.getrusage(resource.RUSAGE_SELF).ru_maxrss*1024}
+
+def run_model_subprocess(name,repeat=3,clear_cache=False):
+    """ run_model in a fresh process in the model folder """
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    folder = os.path.join(root,MODELS[name]['folder'])
+
+    fd,filename = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+
+    try:
+        cmd = [sys.executable,os.path.abspath(__file__),'--worker',name,'--worker-out',filename,'--repeat',str(repeat)]
+        if clear_cache: cmd.append('--clear-cache')
+        out = subprocess.run(cmd,cwd=folder,capture_output=True,text=True)
+        if out.returncode != 0: raise RuntimeError(f'benchmark of {name} failed:\n{out.stderr}')
+        with open(filename) as f:
+            return json.load(f)
+    finally:
+        os.remove(filename)
+
+def environment():
+
+    import numba as nb
+
+    return {
+        'python':platform.python_version(),
+        'numpy':np.__version__,
+        'numba':nb.__version__,
+        'machine':platform.machine(),
+        'cpu_count':os.cpu_count(),
+        'numba_threads':nb.config.NUMBA_NUM_THREADS,
+    }
+
+###############
+# comparisons #
+###############
+
+def compare(results,baseline):
+    """ list of regressions relative to baseline (thresholds are taken from baseline) """
+
+    regressions = []
+    thresholds = baseline.get('thresholds',THRESHOLDS)
+
+    for name,model_results in results['models'].items():
+
+        if not name in baseline['models']: continue
+        model_baseline = baseline['models'][name]
+
+        groups = {'startup':model_results.get('startup',{}),**model_results['stages']}
+        groups_baseline = {'startup':model_baseline.get('startup',{}),**model_baseline['stages']}
+
+        for stage,measures in groups.items():
+            for measure,value in measures.items():
+
+                value_baseline = groups_baseline.get(stage,{}).get(measure)
+                if value_baseline is None or value is None: continue
+
+                threshold = thresholds.get(stage,{}).get(measure)
+                if threshold is None: continue
+
+                if measure.startswith('time') and value-value_baseline < MIN_SECS: continue
+                if measure == 'peak_memory' and value-value_baseline < MIN_BYTES: continue
+                if value > threshold*value_baseline:
+                    regressions.append((name,stage,measure,value,value_baseline,threshold))
+
+    return regressions
+
+def print_results(results):
+
+    for name,model_results in results['models'].items():
+
+        startup = model_results['startup']
+        print(f'{name} [max rss {model_results["max_rss"]/2**20:.0f} MB]')
+        print(f' {"startup":22s}: import {startup["time_import"]:6.3f} secs, first find_ss done after {startup["time_to_first_find_ss"]:8.3f} secs')
+        for stage,measures in model_results['stages'].items():
+            print(f' {stage:22s}: cold {measures["time_cold"]:8.3f} secs, warm {measures["time_warm"]:8.3f} secs, peak {measures["peak_memory"]/2**20:8.1f} MB')
+
+def print_regressions(regressions):
+
+    for name,stage,measure,value,value_baseline,threshold in regressions:
+        print(f'REGRESSION {name}.{stage}.{measure}: {value:.3g} > {threshold:.2f} x {value_baseline:.3g}')
+
+########
+# main #
+########
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description='benchmark of the solution stages of the models')
+    parser.add_argument('--models',nargs='+',default=list(MODELS.keys()),choices=list(MODELS.keys()))
+    parser.add_argument('--repeat',type=int,default=3,help='number of warm calls of each stage (best is reported)')
+    parser.add_argument('--out',default=None,help='JSON file for the results')
+    parser.add_argument('--baseline',default=None,help='JSON file with earlier results to compare with')
+    parser.add_argument('--clear-cache',action='store_true',help='remove the cached numba kernels before each model (cold compilation)')
+    parser.add_argument('--worker',default=None,help=argparse.SUPPRESS)
+    parser.add_argument('--worker-out',default=None,help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    # a. worker
+    if not args.worker is None:
+        sys.path.insert(0,os.getcwd())
+        model_results = run_model(args.worker,repeat=args.repeat,clear_cache=args.clear_cache)
+        with open(args.worker_out,'w') as f:
+            json.dump(model_results,f)
+        return 0
+
+    # b. run
+    results = {'environment':environment(),'thresholds':THRESHOLDS,'models':{}}
+    for name in args.models:
+        results['models'][name] = run_model_subprocess(name,repeat=args.repeat,clear_cache=args.clear_cache)
+
+    print_results(results)
+
+    if not args.out is None:
+        with open(args.out,'w') as f:
+            json.dump(results,f,indent=2)
+
+    # c. compare
+    if not args.baseline is None:
+
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        regressions = compare(results,baseline)
+        print_regressions(regressions)
+        if len(regressions) > 0: return 1
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,2 @@
+# modules shared by the models in Assignment_I, Assignment_II and Exam
+# (the model modules add the repository root to sys.path, so they can be imported as hetools.<module>)
@@ -0,0 +1,156 @@
+import sys
+import time
+import inspect
+import functools
+
+# opt-in profiling of the blocks and the household problem:
+#  the block functions are replaced in their modules (the blocks are looked up by name when evaluated)
+#  and the household and solution methods are shadowed on the model by timed wrappers while the profiler is active,
+#  nested calls are tracked so the time of each call is split in time in children and self time
+#
+# usage:
+#  with model.profile_blocks() as prof:
+#      model.compute_jacs()
+#      model.find_transition_path(shocks=...)
+#  prof.print_table(sort='total')
+#  prof.write_folded('profile.folded') # flame graph (e.g. flamegraph.pl or speedscope)
+
+# methods of the model which are timed (if they exist)
+METHODS = ['find_ss','compute_jacs','find_transition_path','find_IRFs',
+           'solve_hh_ss','simulate_hh_ss','solve_hh_path','simulate_hh_path','solve_hh_backwards']
+
+class BlockProfiler():
+    """ call counts and times of the blocks and household methods of a model """
+
+    def __init__(self,model,methods=METHODS):
+
+        self.model = model
+        self.methods = [method for method in methods if callable(getattr(model,method,None))]
+
+        self._patched_blocks = [] # (module, name, original)
+        self._patched_methods = [] # (name, original instance attribute or None)
+
+        self.reset()
+
+    def reset(self):
+        """ remove all recorded calls """
+
+        self.calls = {} # name -> number of calls
+        self.total = {} # name -> time including children
+        self.self_time = {} # name -> time excluding children
+        self.folded = {} # call stack -> self time
+
+        self._stack = []
+        self._children = [] # time in children for each frame on the stack
+
+    ##########
+    # timing #
+    ##########
+
+    def timed(self,name,func):
+        """ timed wrapper of func (same signature) """
+
+        @functools.wraps(func,updated=())
+        def wrapper(*args,**kwargs):
+
+            self._stack.append(name)
+            self._children.append(0.0)
+
+            t0 = time.perf_counter()
+            try:
+                return func(*args,**kwargs)
+            finally:
+                secs = time.perf_counter()-t0
+                self.record(secs)
+
+        wrapper.__signature__ = inspect.signature(getattr(func,'py_func',func))
+        if hasattr(func,'py_func'): wrapper.py_func = self.timed(name,func.py_func) # numba function (py_func is used if par.py_blocks)
+
+        return wrapper
+
+    def record(self,secs):
+        """ record the call on top of the stack """
+
+        name = self._stack[-1]
+        secs_self = secs-self._children.pop()
+
+        self.calls[name] = self.calls.get(name,0) + 1
+        self.total[name] = self.total.get(name,0.0) + secs
+        self.self_time[name] = self.self_time.get(name,0.0) + secs_self
+
+        key = ';'.join(self._stack)
+        self.folded[key] = self.folded.get(key,0.0) + secs_self
+
+        self._stack.pop()
+        if len(self._children) > 0: self._children[-1] += secs
+
+    ############
+    # patching #
+    ############
+
+    def __enter__(self):
+
+        # a. blocks
+        for blockstr in self.model.blocks:
+
+            if not '.' in blockstr: continue # the household block is timed through its methods
+
+            modulename,funcname = blockstr.rsplit('.',1)
+            module = sys.modules[modulename]
+            func = getattr(module,funcname)
+
+            self._patched_blocks.append((module,funcname,func))
+            setattr(module,funcname,self.timed(blockstr,func))
+
+        # b. methods
+        for method in self.methods:
+            self._patched_methods.append((method,self.model.__dict__.get(method)))
+            self.model.__dict__[method] = self.timed(method,getattr(self.model,method))
+
+        return self
+
+    def __exit__(self,*args):
+
+        for module,funcname,func in self._patched_blocks:
+            setattr(module,funcname,func)
+
+        for method,original in self._patched_methods:
+            if original is None:
+                del self.model.__dict__[method]
+            else:
+                self.model.__dict__[method] = original
+
+        self._patched_blocks = []
+        self._patched_methods = []
+
+    ##########
+    # output #
+    ##########
+
+    def table(self,sort='total'):
+        """ rows (name, calls, total, self, per call) sorted by sort in ['total','self','calls','per_call','name'] """
+
+        rows = [(name,self.calls[name],self.total[name],self.self_time[name],self.total[name]/self.calls[name]) for name in self.calls]
+
+        cols = {'name':0,'calls':1,'total':2,'self':3,'per_call':4}
+        if not sort in cols: raise ValueError(f'sort must be in {list(cols.keys())}')
+
+        return sorted(rows,key=lambda row: row[cols[sort]],reverse=sort != 'name')
+
+    def print_table(self,sort='total'):
+
+        print(f'{"name":30s} {"calls":>10s} {"total":>10s} {"self":>10s} {"per call":>12s}')
+        for name,calls,total,self_time,per_call in self.table(sort=sort):
+            print(f'{name:30s} {calls:10d} {total:8.3f} s {self_time:8.3f} s {per_call*1e3:9.3f} ms')
+
+    def write_folded(self,filename):
+        """ folded call stacks with self time in microseconds (flame graph input) """
+
+        with open(filename,'w') as f:
+            for key,secs in self.folded.items():
+                f.write(f'{key} {int(round(secs*1e6))}\n')
+
+def profile_blocks(model,methods=METHODS):
+    """ profiler for the blocks and household methods of model (use as context manager) """
+
+    return BlockProfiler(model,methods=methods)
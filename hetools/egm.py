@@ -0,0 +1,137 @@
+import time
+import numpy as np
+import numba as nb
+
+from consav.grids import equilogspace
+from consav.linear_interp import interp_1d_vec
+
+# fused endogenous grid method kernels:
+#  the endogenous grid is computed point-by-point while searching it from the left,
+#  which works because both the endogenous grid and cash-on-hand are increasing in assets,
+#  interpolation, the borrowing constraint and the marginal value of cash-on-hand are done in the same pass
+
+@nb.njit(cache=True)
+def egm(a_grid,vbeg_a_plus,beta,sigma,R,y,a,c,v_a):
+    """ EGM for cash-on-hand m = R*a_grid + y, writes a, c and v_a = R*c**(-sigma) """
+
+    Na = a_grid.size
+
+    # a. first two points of the endogenous grid
+    j = 0
+    m_endo_lo = (beta*vbeg_a_plus[0])**(-1/sigma) + a_grid[0]
+    m_endo_hi = (beta*vbeg_a_plus[1])**(-1/sigma) + a_grid[1]
+
+    for i_a in range(Na):
+
+        m = R*a_grid[i_a] + y
+
+        # b. search (never moves left)
+        while j < Na-2 and m_endo_hi <= m:
+            j += 1
+            m_endo_lo = m_endo_hi
+            m_endo_hi = (beta*vbeg_a_plus[j+1])**(-1/sigma) + a_grid[j+1]
+
+        # c. interpolate end-of-period assets and enforce borrowing constraint
+        a_ = ((m_endo_hi-m)*a_grid[j] + (m-m_endo_lo)*a_grid[j+1])/(m_endo_hi-m_endo_lo)
+        a_ = np.fmax(a_,0.0)
+
+        # d. consumption and marginal value of cash-on-hand
+        a[i_a] = a_
+        c[i_a] = m-a_
+        v_a[i_a] = R*c[i_a]**(-sigma)
+
+@nb.njit(cache=True)
+def egm_labor(a_grid,vbeg_a_plus,beta,sigma,nu,fac,z,wt,R,y,a,c,ell,l):
+    """ EGM with labor supply ell = fac*c**(-sigma/nu) for m = R*a_grid + y, writes a, c, ell and l = ell*z (constraint not refined) """
+
+    Na = a_grid.size
+
+    # a. first two points of the endogenous grid
+    j = 0
+
+    c_endo_lo = (beta*vbeg_a_plus[0])**(-1/sigma)
+    ell_endo_lo = fac*c_endo_lo**(-sigma/nu)
+    m_endo_lo = c_endo_lo + a_grid[0] - wt*ell_endo_lo*z
+
+    c_endo_hi = (beta*vbeg_a_plus[1])**(-1/sigma)
+    ell_endo_hi = fac*c_endo_hi**(-sigma/nu)
+    m_endo_hi = c_endo_hi + a_grid[1] - wt*ell_endo_hi*z
+
+    for i_a in range(Na):
+
+        m = R*a_grid[i_a] + y
+
+        # b. search (never moves left)
+        while j < Na-2 and m_endo_hi <= m:
+            j += 1
+            c_endo_lo = c_endo_hi
+            ell_endo_lo = ell_endo_hi
+            m_endo_lo = m_endo_hi
+            c_endo_hi = (beta*vbeg_a_plus[j+1])**(-1/sigma)
+            ell_endo_hi = fac*c_endo_hi**(-sigma/nu)
+            m_endo_hi = c_endo_hi + a_grid[j+1] - wt*ell_endo_hi*z
+
+        # c. interpolate consumption and labor supply
+        denom = m_endo_hi-m_endo_lo
+        c[i_a] = ((m_endo_hi-m)*c_endo_lo + (m-m_endo_lo)*c_endo_hi)/denom
+        ell[i_a] = ((m_endo_hi-m)*ell_endo_lo + (m-m_endo_lo)*ell_endo_hi)/denom
+        l[i_a] = ell[i_a]*z
+
+        # d. saving
+        a[i_a] = m + wt*l[i_a] - c[i_a]
+
+#############
+# benchmark #
+#############
+
+@nb.njit(cache=True)
+def egm_unfused(a_grid,vbeg_a_plus,beta,sigma,R,y,a,c,v_a):
+    """ EGM with separate passes and temporaries (reference for benchmark) """
+
+    m = R*a_grid + y
+    c_endo = (beta*vbeg_a_plus)**(-1/sigma)
+    m_endo = c_endo + a_grid
+
+    interp_1d_vec(m_endo,a_grid,m,a)
+    a[:] = np.fmax(a,0.0)
+    c[:] = m-a
+    v_a[:] = R*c**(-sigma)
+
+@nb.njit # not cached (func is an argument)
+def _repeat(func,Nrep,a_grid,vbeg_a_plus,beta,sigma,R,y,a,c,v_a):
+
+    for _ in range(Nrep):
+        func(a_grid,vbeg_a_plus,beta,sigma,R,y,a,c,v_a)
+
+def benchmark(Na=300,Nrep=10_000,do_print=True):
+    """ time per EGM iteration (one income state) of the fused and the unfused kernel """
+
+    # a. problem
+    a_grid = equilogspace(0.0,100.0,Na)
+    R = 1.01
+    y = 1.0
+    beta = 0.96
+    sigma = 2.0
+    vbeg_a_plus = R*(0.5+0.05*a_grid)**(-sigma)
+
+    outputs = {func:(np.zeros(Na),np.zeros(Na),np.zeros(Na)) for func in [egm,egm_unfused]}
+
+    # b. time
+    times = {}
+    for func,(a,c,v_a) in outputs.items():
+
+        _repeat(func,1,a_grid,vbeg_a_plus,beta,sigma,R,y,a,c,v_a) # compile
+
+        t0 = time.perf_counter()
+        _repeat(func,Nrep,a_grid,vbeg_a_plus,beta,sigma,R,y,a,c,v_a)
+        times[func.__name__] = (time.perf_counter()-t0)/Nrep
+
+    max_abs_diff = np.max(np.abs(outputs[egm][0]-outputs[egm_unfused][0]))
+
+    # c. report
+    if do_print:
+        print(f'unfused: {times["egm_unfused"]*1e6:8.3f} us per iteration')
+        print(f'fused:   {times["egm"]*1e6:8.3f} us per iteration [speedup {times["egm_unfused"]/times["egm"]:5.2f}]')
+        print(f'max abs. diff. in a: {max_abs_diff:.1e}')
+
+    return times
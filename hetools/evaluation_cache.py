@@ -0,0 +1,112 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+def fingerprint(model,ss_varnames=None):
+    """ hash of all scalar parameters and the exogenous steady state variables """
+
+    par = model.par
+    ss = model.ss
+
+    if ss_varnames is None: ss_varnames = model.shocks
+
+    items = [(key,value) for key,value in par.__dict__.items() if np.isscalar(value)]
+    items += [(f'ss.{varname}',ss.__dict__[varname]) for varname in ss_varnames]
+    items = [(key,value.item() if isinstance(value,np.generic) else value) for key,value in items] # same repr for numpy scalars
+
+    return hashlib.sha1(repr(sorted(items)).encode()).hexdigest()
+
+def take_snapshot(model):
+    """ copy of the steady state and the grids set when preparing it """
+
+    par = model.par
+    ss = model.ss
+
+    snapshot = {
+        'par':{key:value.copy() for key,value in par.__dict__.items() if type(value) is np.ndarray},
+        'ss':{key:value.copy() if type(value) is np.ndarray else value for key,value in ss.__dict__.items()}
+    }
+
+    return snapshot
+
+def restore_snapshot(model,snapshot):
+    """ restore the steady state from a snapshot """
+
+    for ns in ['par','ss']:
+        namespace = getattr(model,ns)
+        for key,value in snapshot[ns].items():
+            if type(value) is np.ndarray:
+                namespace.__dict__[key][:] = value
+            else:
+                namespace.__dict__[key] = value
+
+class EvaluationCache():
+    """ bounded LRU cache of steady state evaluations """
+
+    def __init__(self,maxsize=32,ss_varnames=None):
+        """ ss_varnames are the exogenous steady state variables in the key (default: model.shocks) """
+
+        self.maxsize = maxsize
+        self.ss_varnames = ss_varnames
+
+        self.hits = 0
+        self.misses = 0
+
+        self._store = OrderedDict()
+
+    def key(self,funcname,x,model):
+        """ key of an evaluation """
+
+        x = tuple(float(x_) for x_ in np.atleast_1d(x))
+        return (funcname,x,fingerprint(model,ss_varnames=self.ss_varnames))
+
+    def store(self,key,value,snapshot=None):
+        """ store an evaluation and drop the least recently used if full """
+
+        self._store[key] = (value,snapshot)
+        self._store.move_to_end(key)
+        while len(self._store) > self.maxsize:
+            self._store.popitem(last=False)
+
+    def lookup(self,key,model):
+        """ return the cached value and restore its snapshot (None if not cached) """
+
+        if not key in self._store:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._store.move_to_end(key)
+
+        value,snapshot = self._store[key]
+        if snapshot is not None: restore_snapshot(model,snapshot)
+
+        return value
+
+    def evaluate(self,func,x,model,**kwargs):
+        """ evaluate func(x,model,**kwargs) or restore the cached evaluation """
+
+        key = self.key(func.__name__,x,model)
+
+        value = self.lookup(key,model)
+        if value is None:
+            value = func(x,model,**kwargs)
+            self.store(key,value,take_snapshot(model))
+
+        return value
+
+    def clear(self):
+        """ empty the cache and reset the counters """
+
+        self._store.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+
+        return len(self._store)
+
+    def __str__(self):
+
+        return f'EvaluationCache: {self.hits} hits, {self.misses} misses, {len(self)} of {self.maxsize} stored'
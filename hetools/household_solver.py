@@ -0,0 +1,150 @@
+import time
+import inspect
+import numpy as np
+
+from EconModel import jit
+from consav.misc import elapsed
+
+# accelerated alternative to GEModelTools' solve_hh_ss (used by hetools.household_ss.solve_hh_ss if par.hh_solver = 'anderson')
+# the fixed point is vbeg_a = T(vbeg_a) where T is one call of solve_hh_backwards,
+# convergence is checked on the plain step max|T(vbeg_a)-vbeg_a| < par.tol_solve as in solve_hh_ss,
+# so the returned solution (policies and vbeg_a = T(vbeg_a)) satisfies the same tolerance
+#
+# as in solve_hh_ss, prepare_hh_ss() is called first and the initial guess then overwrites its values in ss
+
+def backwards_step(model,par,ss,args,vbeg_a_plus,first=False):
+    """ one call of solve_hh_backwards with vbeg_a_plus, outputs are written to ss """
+
+    kwargs = {}
+    for arg in args[1:]:
+        if arg == 'vbeg_a_plus':
+            kwargs[arg] = vbeg_a_plus
+        elif arg == 'ss':
+            kwargs[arg] = first
+        else:
+            kwargs[arg] = getattr(ss,arg)
+
+    model.solve_hh_backwards(par,**kwargs)
+
+def solve_hh_ss_accelerated(model,method='anderson',Nanderson=5,restart_factor=2.0,do_print=False,initial_guess=None):
+    """ solve the household problem in steady state with Anderson acceleration (method='anderson') or plain iteration (method='plain')
+
+    the Anderson step is safeguarded: if it gives a non-finite or negative vbeg_a,
+    or the residual increases by more than restart_factor, the plain step is used and the history is reset
+
+    """
+
+    t0 = time.time()
+
+    par = model.par
+    ss = model.ss
+
+    # initial guess (as in solve_hh_ss)
+    model.prepare_hh_ss()
+
+    if initial_guess is not None:
+        for varname,value in initial_guess.items():
+            ss.__dict__[varname][:] = value
+
+    args = inspect.getfullargspec(model.solve_hh_backwards.py_func).args
+
+    stats = {'method':method,'iterations':0,'anderson_steps':0,'fallbacks':0}
+
+    with jit(model) as model_jit:
+
+        par_jit = model_jit.par
+        ss_jit = model_jit.ss
+
+        x = ss.vbeg_a.copy() # current guess
+        dx_hist = [] # differences in guesses
+        df_hist = [] # differences in residuals
+        f_old = None
+        x_old = None
+        res_best = np.inf
+
+        it = 0
+        while True:
+
+            # a. plain step
+            backwards_step(model,par_jit,ss_jit,args,x,first=it==0)
+            Tx = ss.vbeg_a.copy()
+
+            f = Tx-x
+            res = np.max(np.abs(f))
+
+            it += 1
+            if res < par.tol_solve: break
+            if it >= par.max_iter_solve: raise ValueError('solve_hh_ss_accelerated: too many iterations')
+
+            # b. next guess
+            if method == 'plain' or not np.isfinite(res):
+
+                x_new = Tx
+
+            elif method == 'anderson':
+
+                # i. safeguard: reset when the residual increases
+                if res > restart_factor*res_best:
+                    dx_hist.clear()
+                    df_hist.clear()
+                    f_old = None
+                    stats['fallbacks'] += 1
+
+                res_best = np.fmin(res_best,res)
+
+                # ii. history
+                if f_old is not None:
+                    dx_hist.append((x-x_old).ravel())
+                    df_hist.append((f-f_old).ravel())
+                    if len(dx_hist) > Nanderson:
+                        dx_hist.pop(0)
+                        df_hist.pop(0)
+
+                x_old = x
+                f_old = f
+
+                # iii. Anderson mixing
+                x_new = Tx
+                if len(df_hist) > 0:
+
+                    dF = np.array(df_hist).T
+                    dX = np.array(dx_hist).T
+                    gamma = np.linalg.lstsq(dF,f.ravel(),rcond=None)[0]
+
+                    x_anderson = Tx - ((dX+dF)@gamma).reshape(x.shape)
+
+                    if np.all(np.isfinite(x_anderson)) and np.all(x_anderson >= 0.0):
+                        x_new = x_anderson
+                        stats['anderson_steps'] += 1
+                    else:
+                        dx_hist.clear()
+                        df_hist.clear()
+                        f_old = None
+                        stats['fallbacks'] += 1
+
+            else:
+
+                raise ValueError(f'unknown method {method}')
+
+            x = x_new
+
+    stats['iterations'] = it
+    stats['residual'] = res
+    stats['time'] = time.time()-t0
+
+    if do_print: print(f'household problem in ss solved in {elapsed(t0)} [{it} iterations, {method}]')
+
+    return stats
+
+def compare_solvers(model,methods=('plain','anderson'),do_print=True):
+    """ iterations and time of the household solvers from the initial guess of prepare_hh_ss() """
+
+    results = {}
+    for method in methods:
+        results[method] = solve_hh_ss_accelerated(model,method=method)
+
+    if do_print:
+        for method,stats in results.items():
+            print(f'{method:10s}: {stats["iterations"]:6d} iterations in {stats["time"]:6.2f} secs [residual {stats["residual"]:.1e}, {stats["fallbacks"]} fallbacks]')
+
+    return results
@@ -0,0 +1,117 @@
+import time
+import inspect
+import contextlib
+import functools
+import numpy as np
+
+from consav.misc import elapsed
+
+from hetools import stationary_distribution, household_solver
+
+# steady state household problem returning the number of iterations (used to measure warm starts):
+#  the backward iterations are counted by shadowing solve_hh_backwards on the model with a counting wrapper
+#  (as hetools.block_profiler does), so GEModelTools' solve_hh_ss is used unchanged,
+#  the solver is chosen by par.hh_solver ('plain': GEModelTools' solve_hh_ss, 'anderson': hetools.household_solver),
+#  the forward iterations are only counted if requested (count=True, used by the warm start statistics),
+#  they are then done here with the sparse transition operator of hetools.stationary_distribution
+#  (same convergence criterion as simulate_hh_ss) and GEModelTools' simulate_hh_ss is started from the
+#  converged distribution (verifies it and computes the aggregates), otherwise GEModelTools' simulate_hh_ss is used directly
+
+@contextlib.contextmanager
+def count_calls(model,method='solve_hh_backwards'):
+    """ count the calls of a method of model while active, yields a dict with the key 'calls' """
+
+    counter = {'calls':0}
+
+    original = model.__dict__.get(method)
+    func = getattr(model,method)
+
+    def counted(func):
+
+        @functools.wraps(func,updated=())
+        def wrapper(*args,**kwargs):
+            counter['calls'] += 1
+            return func(*args,**kwargs)
+
+        wrapper.__signature__ = inspect.signature(getattr(func,'py_func',func))
+        if hasattr(func,'py_func'): wrapper.py_func = counted(func.py_func) # numba function (py_func is used if par.py_hh)
+
+        return wrapper
+
+    model.__dict__[method] = counted(func)
+
+    try:
+        yield counter
+    finally:
+        if original is None:
+            del model.__dict__[method]
+        else:
+            model.__dict__[method] = original
+
+def solve_hh_ss(model,do_print=False,initial_guess=None):
+    """ solve household problem in steady state with the solver in par.hh_solver, returns the number of backward iterations
+
+    with 'anderson' GEModelTools' solve_hh_ss is called from the accelerated solution afterwards,
+    it converges in one iteration and sets everything else solve_hh_ss sets
+
+    """
+
+    par = model.par
+    ss = model.ss
+
+    with count_calls(model) as counter:
+
+        if par.hh_solver == 'plain':
+            model.solve_hh_ss(do_print=do_print,initial_guess=initial_guess)
+        elif par.hh_solver == 'anderson':
+            household_solver.solve_hh_ss_accelerated(model,do_print=do_print,initial_guess=initial_guess)
+            model.solve_hh_ss(initial_guess={'vbeg_a':ss.vbeg_a.copy()})
+        else:
+            raise ValueError(f'unknown par.hh_solver = {par.hh_solver}, should be plain or anderson')
+
+    return counter['calls']
+
+def iterate_Dbeg(model,Dbeg):
+    """ stationary beginning-of-period distribution by forward iteration from Dbeg, returns it and the number of iterations """
+
+    par = model.par
+    ss = model.ss
+
+    Ps = [stationary_distribution.transition_operator(ss.z_trans[i_fix],par.a_grid,ss.a[i_fix]) for i_fix in range(par.Nfix)]
+    D = [Dbeg[i_fix].ravel() for i_fix in range(par.Nfix)]
+
+    for it in range(1,par.max_iter_simulate+1):
+
+        D_new = [P@D_ for P,D_ in zip(Ps,D)]
+        max_abs_diff = max(np.max(np.abs(D_new_-D_)) for D_new_,D_ in zip(D_new,D))
+        D = D_new
+
+        if max_abs_diff < par.tol_simulate: break
+
+    else:
+
+        raise ValueError('iterate_Dbeg: too many iterations')
+
+    return np.stack(D).reshape(Dbeg.shape),it
+
+def simulate_hh_ss(model,do_print=False,Dbeg=None,count=False):
+    """ simulate household problem in steady state (stationary distribution solved directly if par.direct_D), returns the number of forward iterations if count (otherwise None) """
+
+    t0 = time.time()
+
+    # a. stationary distribution
+    if model.par.direct_D:
+        Dbeg = stationary_distribution.find_Dbeg_direct(model)
+        it = 0
+    elif count:
+        Dbeg,it = iterate_Dbeg(model,model.ss.Dbeg if Dbeg is None else Dbeg)
+    else:
+        model.simulate_hh_ss(do_print=do_print,Dbeg=Dbeg) # numba forward iterations of GEModelTools
+        return None
+
+    # b. aggregates
+    model.simulate_hh_ss(Dbeg=Dbeg)
+
+    if do_print: print(f'household problem in ss simulated in {elapsed(t0)} [{it} iterations{", direct" if model.par.direct_D else ""}]')
+
+    return it
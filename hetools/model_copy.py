@@ -0,0 +1,83 @@
+import os
+import copy
+import atexit
+import shutil
+import weakref
+import tempfile
+import numpy as np
+
+# large arrays are written to a backing file which the copy maps copy-on-write (the model itself is not changed),
+# the copies share the unchanged pages of the file and only the written pages are materialized,
+# the file is reused for later copies as long as the array is unchanged
+
+_folder = None
+_files = {} # id(array) -> (weakref to array, filename)
+
+def _backing_folder():
+    """ temporary folder for the backing files (removed at exit) """
+
+    global _folder
+
+    if _folder is None:
+        _folder = tempfile.mkdtemp(prefix='model_copy_')
+        atexit.register(shutil.rmtree,_folder,ignore_errors=True)
+
+    return _folder
+
+def _map(filename):
+    """ copy-on-write map of a backing file as a plain ndarray """
+
+    for key in [key for key,(ref,_) in _files.items() if ref() is None]: del _files[key]
+
+    view = np.load(filename,mmap_mode='c').view(np.ndarray)
+    _files[id(view)] = (weakref.ref(view),filename)
+
+    return view
+
+def _backing_file(array):
+    """ backing file with the current content of array (written if array is not mapped or has been changed) """
+
+    if id(array) in _files:
+        ref,filename = _files[id(array)]
+        if ref() is array and np.array_equal(array,np.load(filename,mmap_mode='r')):
+            return filename
+
+    fd,filename = tempfile.mkstemp(suffix='.npy',dir=_backing_folder())
+    os.close(fd)
+    np.save(filename,array)
+
+    _files[id(array)] = (weakref.ref(array),filename)
+
+    return filename
+
+def _containers(model):
+    """ namespaces and dictionaries of model holding arrays """
+
+    for value in model.__dict__.values():
+        if type(value) is dict:
+            yield value
+        elif hasattr(value,'__dict__') and not callable(value):
+            yield value.__dict__
+
+def copy_cow(model,name=None,min_nbytes=2**16):
+    """ copy of model with all arrays larger than min_nbytes mapped copy-on-write from a backing file (model is not changed) """
+
+    if name is None: name = f'{model.name}_copy'
+
+    # a. copy-on-write maps used by deepcopy instead of copies (the same map for all references to an array)
+    memo = {}
+
+    for container in [model.__dict__,*_containers(model)]:
+        for value in container.values():
+
+            if not type(value) is np.ndarray or id(value) in memo: continue
+            if value.nbytes < min_nbytes or value.dtype.hasobject: continue
+            if not (value.flags.owndata or id(value) in _files): continue # views of other arrays are deep-copied
+
+            memo[id(value)] = _map(_backing_file(value))
+
+    # b. copy everything else
+    other = copy.deepcopy(model,memo)
+    other.name = name
+
+    return other
@@ -0,0 +1,90 @@
+import os
+import sys
+import glob
+import time
+import inspect
+import hashlib
+from collections import namedtuple
+
+import numba as nb
+
+from EconModel import jit
+from consav.misc import elapsed
+
+# persistent compilation cache for the numba kernels (all kernels are decorated with cache=True):
+#  the namespaces are passed to numba as namedtuples created by EconModel for each model,
+#  numba types a namedtuple by its class, so a new class in each process never hits the cache,
+#  stable_namedtuples() replaces the classes by classes registered in this module under a name given by the fields,
+#  such that they are pickled by reference and are the same type in all processes
+#
+# numba only checks the time stamp of the file of the cached function itself,
+# use clear_cache() after changing a kernel which is called from another file (e.g. hetools.egm)
+
+def stable_namedtuple(cls):
+    """ registered namedtuple class with the same name and fields as cls """
+
+    name = f'{cls.__name__}_{hashlib.sha1(",".join(cls._fields).encode()).hexdigest()[:16]}'
+
+    module = sys.modules[__name__]
+    if not hasattr(module,name):
+        setattr(module,name,namedtuple(name,cls._fields,module=__name__))
+
+    return getattr(module,name)
+
+def stable_namedtuples(model):
+    """ use registered namedtuple classes for all namespaces of model (call after infer_types) """
+
+    namedtuples = model._ns_specs['namedtuple']
+    for ns,cls in namedtuples.items():
+        namedtuples[ns] = stable_namedtuple(cls)
+
+def compile_for(func,*args,**kwargs):
+    """ compile numba function func for the types of args and kwargs without calling it """
+
+    pyargs = inspect.getfullargspec(func.py_func).args
+
+    values = list(args) + [kwargs[arg] for arg in pyargs[len(args):]]
+    func.compile(tuple(nb.typeof(value) for value in values))
+
+def warm_up(model,do_print=False):
+    """ compile (or load from the cache) the household problem and the blocks for the types of model """
+
+    t0 = time.time()
+
+    with jit(model) as model_jit:
+
+        par = model_jit.par
+        ini = model_jit.ini
+        ss = model_jit.ss
+        path = model_jit.path
+
+        # a. household problem (steady state signature as in solve_hh_ss)
+        if not model.solve_hh_backwards is None:
+
+            args = inspect.getfullargspec(model.solve_hh_backwards.py_func).args
+            kwargs = {arg:getattr(ss,arg) for arg in args[1:] if not arg in ['vbeg_a_plus','ss']}
+            kwargs['vbeg_a_plus'] = ss.vbeg_a
+            if 'ss' in args: kwargs['ss'] = True
+
+            compile_for(model.solve_hh_backwards,par,**kwargs)
+
+        # b. blocks (evaluated on the path)
+        for blockstr in model.blocks:
+
+            if blockstr == 'hh': continue
+
+            modulename,funcname = blockstr.rsplit('.',1)
+            func = getattr(sys.modules[modulename],funcname)
+
+            args = inspect.getfullargspec(func.py_func).args
+            compile_for(func,par,ini,ss,**{arg:getattr(path,arg) for arg in args[3:]})
+
+    if do_print: print(f'numba kernels compiled in {elapsed(t0)}')
+
+def clear_cache(folder=None):
+    """ remove the cached kernels in folder and its subfolders (default: the repository root, i.e. all models and hetools) """
+
+    if folder is None: folder = os.path.abspath(os.path.join(os.path.dirname(__file__),os.pardir))
+
+    for filename in glob.glob(os.path.join(folder,'**','__pycache__','*.nb[ic]'),recursive=True):
+        os.remove(filename)
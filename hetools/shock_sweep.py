@@ -0,0 +1,108 @@
+import numpy as np
+
+# the shock is par.jump_[shock]*par.rho_[shock]**t, both parameters must be defined in setup() of the model
+
+def set_shock_par(model,shock,jump,rho):
+    """ set par.jump_[shock] and par.rho_[shock] and return the previous values """
+
+    par = model.par
+
+    names = [f'jump_{shock}',f'rho_{shock}']
+    for name in names:
+        if not name in par.__dict__: raise ValueError(f'par.{name} must be defined in setup()')
+
+    old = tuple(par.__dict__[name] for name in names)
+
+    par.__dict__[f'jump_{shock}'] = jump
+    par.__dict__[f'rho_{shock}'] = rho
+
+    return old
+
+def restore_shock_par(model,shock,old):
+    """ restore par.jump_[shock] and par.rho_[shock] """
+
+    par = model.par
+
+    par.__dict__[f'jump_{shock}'],par.__dict__[f'rho_{shock}'] = old
+
+def shock_sweep(model,shock,jumps,rhos,varnames=None,do_nonlinear_check=False,do_print=False):
+    """ linear impulse responses for all combinations of shock sizes and persistences
+
+    requires compute_jacs() without skip_shocks, the shock is jump*rho**t
+    returns IRFs[varname][i_jump,i_rho,t] and check[varname] = (max abs. diff., relative) for the largest shock (None if not do_nonlinear_check)
+
+    """
+
+    par = model.par
+    ss = model.ss
+
+    jumps = np.atleast_1d(np.asarray(jumps,dtype=float))
+    rhos = np.atleast_1d(np.asarray(rhos,dtype=float))
+
+    IRFs = {}
+    check = None
+    old = set_shock_par(model,shock,1.0,float(rhos[0]))
+
+    try:
+
+        # a. unit responses for each persistence (G_U is only found once)
+        for i_rho,rho in enumerate(rhos):
+
+            par.__dict__[f'rho_{shock}'] = float(rho)
+            model.find_IRFs(shocks=[shock],reuse_G_U=i_rho>0)
+
+            if varnames is None: varnames = [varname for varname in model.IRF.keys() if type(varname) is str]
+
+            for varname in varnames:
+
+                if i_rho == 0: IRFs[varname] = np.zeros((jumps.size,rhos.size,par.T))
+                unit = model.IRF[varname].ravel()[:par.T]
+
+                # responses are linear in the size of the shock
+                IRFs[varname][:,i_rho,:] = np.outer(jumps,unit)
+
+        # b. nonlinear check for the largest shock
+        if do_nonlinear_check:
+            check = nonlinear_check(model,shock,jumps,rhos,IRFs,varnames,do_print=do_print)
+
+    finally:
+
+        restore_shock_par(model,shock,old)
+
+    if do_print: print(f'linear IRFs for {jumps.size} x {rhos.size} shocks to {shock}')
+
+    return IRFs,check
+
+def nonlinear_check(model,shock,jumps,rhos,IRFs,varnames,do_print=False):
+    """ max abs. difference between the nonlinear and the linear transition path for the largest shock """
+
+    par = model.par
+    ss = model.ss
+
+    # a. largest shock (largest jump and the most persistent)
+    i_jump = np.argmax(np.abs(jumps))
+    i_rho = np.argmax(rhos)
+
+    par.__dict__[f'jump_{shock}'] = float(jumps[i_jump])
+    par.__dict__[f'rho_{shock}'] = float(rhos[i_rho])
+
+    # b. nonlinear transition path
+    model.find_transition_path(shocks=[shock],do_print=False,do_end_check=False)
+
+    # c. differences
+    check = {}
+    for varname in varnames:
+
+        if not (varname in model.path.__dict__ and varname in ss.__dict__): continue
+
+        linear = IRFs[varname][i_jump,i_rho]
+        nonlinear = model.path.__dict__[varname].ravel()[:par.T]-ss.__dict__[varname]
+
+        max_abs_diff = np.max(np.abs(nonlinear-linear))
+        max_abs_linear = np.max(np.abs(linear))
+
+        check[varname] = (max_abs_diff,max_abs_diff/max_abs_linear if max_abs_linear > 0 else np.nan)
+
+        if do_print: print(f'{varname:15s}: max abs. diff. = {check[varname][0]:.2e} [relative: {check[varname][1]:.2e}]')
+
+    return check
@@ -0,0 +1,85 @@
+import time
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import spsolve
+
+from consav.misc import elapsed
+
+def lottery(a_grid,a):
+    """ left grid point and weight on it for the linear lottery of the policy a """
+
+    i = np.fmin(np.fmax(np.searchsorted(a_grid,a,side='right')-1,0),a_grid.size-2)
+    w = (a_grid[i+1]-a)/(a_grid[i+1]-a_grid[i])
+    w = np.fmin(np.fmax(w,0.0),1.0)
+
+    return i,w
+
+def transition_operator(z_trans,a_grid,a):
+    """ sparse operator from Dbeg to Dbeg next period for one fixed type, states are ordered as (z,a)
+
+    z_trans is Nz x Nz or Na x Nz x Nz (depends on beginning-of-period assets) and a is Nz x Na
+
+    """
+
+    Nz,Na = a.shape
+
+    # a. z transition from (z_lag,a_lag) to (z,a_lag)
+    if z_trans.ndim == 2:
+        p = np.broadcast_to(z_trans[:,:,np.newaxis],(Nz,Nz,Na)) # z_lag x z x a_lag
+    else:
+        p = np.transpose(z_trans,(1,2,0)) # z_lag x z x a_lag
+
+    # b. lottery from (z,a_lag) to (z,a)
+    i,w = lottery(a_grid,a) # z x a_lag
+
+    i_z_lag,i_z,i_a_lag = np.meshgrid(np.arange(Nz),np.arange(Nz),np.arange(Na),indexing='ij')
+
+    cols = (i_z_lag*Na + i_a_lag).ravel()
+    rows_left = (i_z*Na + i[i_z,i_a_lag]).ravel()
+
+    p = p.ravel()
+    w = w[i_z,i_a_lag].ravel()
+
+    rows = np.concatenate((rows_left,rows_left+1))
+    data = np.concatenate((p*w,p*(1-w)))
+
+    return sparse.csc_matrix((data,(rows,np.concatenate((cols,cols)))),shape=(Nz*Na,Nz*Na))
+
+def find_Dbeg_direct(model):
+    """ stationary beginning-of-period distribution from a sparse linear solve for each fixed type """
+
+    par = model.par
+    ss = model.ss
+
+    Dbeg = np.zeros(ss.Dbeg.shape)
+    for i_fix in range(par.Nfix):
+
+        mass = np.sum(ss.Dbeg[i_fix]) # constant for each fixed type
+        if mass == 0.0: continue
+
+        # a. operator
+        P = transition_operator(ss.z_trans[i_fix],par.a_grid,ss.a[i_fix])
+        n = P.shape[0]
+
+        # b. (I-P) D = 0 with one equation replaced by sum(D) = mass (each row of I-P is redundant)
+        A = (sparse.identity(n,format='csr')-P).tolil()
+        A[0,:] = np.ones(n)
+        b = np.zeros(n)
+        b[0] = mass
+
+        D = spsolve(A.tocsc(),b)
+        D = np.fmax(D,0.0)
+
+        Dbeg[i_fix] = (mass*D/np.sum(D)).reshape(ss.Dbeg[i_fix].shape)
+
+    return Dbeg
+
+def simulate_hh_ss_direct(model,do_print=False):
+    """ simulate household problem in steady state starting from the directly solved stationary distribution (iteration verifies it) """
+
+    t0 = time.time()
+
+    Dbeg = find_Dbeg_direct(model)
+    if do_print: print(f'stationary distribution solved directly in {elapsed(t0)}')
+
+    model.simulate_hh_ss(do_print=do_print,Dbeg=Dbeg)
@@ -0,0 +1,55 @@
+import time
+import inspect
+import numpy as np
+import numba as nb
+
+from EconModel import jit
+
+# the household problems are parallel over the flattened (i_fix,i_z) index with nb.prange,
+# each iteration writes its own slice, so the results are identical for any number of threads
+
+def set_num_threads(Nthreads=None):
+    """ set number of threads used in the household problem (None: all available) """
+
+    nb.set_num_threads(nb.config.NUMBA_NUM_THREADS if Nthreads is None else Nthreads)
+
+def speedup_report(model,Nthreads_list=None,Nrep=20,do_print=True):
+    """ time one backward step in the steady state for different numbers of threads """
+
+    Nthreads_max = nb.config.NUMBA_NUM_THREADS
+    if Nthreads_list is None: Nthreads_list = [2**k for k in range(int(np.log2(Nthreads_max))+1)]
+
+    Nthreads_ini = nb.get_num_threads()
+    args = inspect.getfullargspec(model.solve_hh_backwards.py_func).args
+
+    with jit(model) as model_jit:
+
+        par = model_jit.par
+        ss = model_jit.ss
+
+        # a. arguments (outputs are copies)
+        kwargs = {}
+        for arg in args[1:]:
+            if arg == 'ss': continue
+            value = ss.vbeg_a if arg == 'vbeg_a_plus' else getattr(ss,arg)
+            kwargs[arg] = value.copy() if type(value) is np.ndarray else value
+
+        # b. time
+        times = {}
+        for Nthreads in Nthreads_list:
+
+            nb.set_num_threads(Nthreads)
+            model.solve_hh_backwards(par,**kwargs) # compile
+
+            t0 = time.perf_counter()
+            for _ in range(Nrep): model.solve_hh_backwards(par,**kwargs)
+            times[Nthreads] = (time.perf_counter()-t0)/Nrep
+
+    nb.set_num_threads(Nthreads_ini)
+
+    # c. report
+    if do_print:
+        for Nthreads,time_ in times.items():
+            print(f'{Nthreads:3d} threads: {time_*1000:8.3f} ms per backward step [speedup {times[Nthreads_list[0]]/time_:5.2f}]')
+
+    return times
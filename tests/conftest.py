@@ -0,0 +1,27 @@
+import os
+import sys
+import importlib
+
+# the tests import the shared modules as hetools.<module> and the model modules from their folder
+
+root = os.path.abspath(os.path.join(os.path.dirname(__file__),os.pardir))
+if not root in sys.path: sys.path.append(root)
+
+def import_from(folder,modulename):
+    """ import modulename from folder (Assignment_I, Assignment_II or Exam), the folders have modules with the same names """
+
+    path = os.path.join(root,folder)
+
+    # a. forget modules imported from the other folders
+    for name,module in list(sys.modules.items()):
+        filename = getattr(module,'__file__',None)
+        if filename is None: continue
+        if os.path.dirname(os.path.abspath(filename)) in [os.path.join(root,other) for other in ['Assignment_I','Assignment_II','Exam'] if other != folder]:
+            del sys.modules[name]
+
+    # b. import
+    sys.path.insert(0,path)
+    try:
+        return importlib.import_module(modulename)
+    finally:
+        sys.path.remove(path)
@@ -0,0 +1,162 @@
+import copy
+import importlib.util
+from types import SimpleNamespace
+import numpy as np
+import pytest
+
+from conftest import import_from
+
+steady_state = import_from('Assignment_I','steady_state')
+HANCModel = import_from('Assignment_I','HANCModel') if importlib.util.find_spec('GEModelTools') else None
+
+def test_adaptive_grid():
+
+    # distribution with no mass above a = 10 and a concave consumption function
+    a_grid = np.linspace(0.0,100.0,200)
+    D = np.zeros((2,3,a_grid.size))
+    D[...,a_grid < 10.0] = 1.0
+    D /= D.sum()
+    c = np.ones((2,3,1))*np.sqrt(1.0+a_grid)
+
+    a_grid_new = steady_state.adaptive_grid(a_grid,D,c,50)
+
+    assert a_grid_new.size == 50
+    assert a_grid_new[0] == 0.0
+    assert np.all(np.diff(a_grid_new) > 0.0)
+    assert a_grid_new[-1] < 20.0 # truncated with a margin
+    assert np.sum(a_grid_new < 10.0) > 25 # refined where the mass is
+
+class MockModel():
+    """ grids and prepare_hh_ss as in HANCModel, find_ss sets a coarse solution at K = K_coarse """
+
+    calls = [] # keyword arguments of find_ss
+
+    def __init__(self,name='model',Na=60,K_coarse=3.0):
+
+        self.name = name
+        self.par = SimpleNamespace(Nfix=6,Nz=3,beta_mean=0.975,sigma_beta=0.01,sigma=2.0,nu=0.5,rho_z=0.9,sigma_psi=0.1,
+                                   delta=0.1,a_max=50.0,Na=Na,adaptive_grid=False)
+        self.ss = SimpleNamespace(K=np.nan,rK=0.12,w0=1.0,w1=1.2)
+        self.K_coarse = K_coarse
+
+        self.allocate()
+
+    def allocate(self):
+
+        par = self.par
+        ss = self.ss
+
+        par.a_grid = np.zeros(par.Na)
+        par.a_grid_rel = np.zeros(par.Na)
+        par.z_grid = np.zeros(par.Nz)
+        par.beta_grid = np.zeros(par.Nfix)
+        par.eta0_grid = np.zeros(par.Nfix)
+        par.eta1_grid = np.zeros(par.Nfix)
+
+        for varname in ['Dbeg','D','vbeg_a','c']: ss.__dict__[varname] = np.zeros((par.Nfix,par.Nz,par.Na))
+        ss.z_trans = np.zeros((par.Nfix,par.Nz,par.Nz))
+
+    prepare_hh_ss = steady_state.prepare_hh_ss
+
+    def copy(self,name=None):
+
+        other = copy.deepcopy(self)
+        other.name = name
+
+        return other
+
+    def find_ss(self,do_print=False,**kwargs):
+
+        MockModel.calls.append(kwargs)
+
+        par = self.par
+        ss = self.ss
+
+        self.prepare_hh_ss()
+        ss.K = self.K_coarse
+        ss.D[:] = np.exp(-par.a_grid)/(par.Nfix*par.Nz*np.sum(np.exp(-par.a_grid)))
+        ss.c[:] = np.sqrt(1.0+par.a_grid)
+
+@pytest.fixture
+def obj_ss(monkeypatch):
+    """ objective with the root at K = 3 which records the cache it is called with """
+
+    caches = []
+
+    def obj_ss(K_ss,model,do_print=False,warm_start=False,cache=None):
+        caches.append(cache)
+        model.ss.K = K_ss
+        return K_ss-3.0
+
+    monkeypatch.setattr(steady_state,'obj_ss',obj_ss)
+    MockModel.calls.clear()
+
+    return caches
+
+@pytest.mark.parametrize('K_coarse',[3.05,4.0]) # in and outside the narrow bracket
+def test_find_ss_adaptive_mock(obj_ss,K_coarse):
+
+    model = MockModel(K_coarse=K_coarse)
+    par = model.par
+    cache = object()
+
+    steady_state.find_ss(model,adaptive=True,Na_coarse=40,warm_start=True,cache=cache)
+
+    # a. solution on the adaptive grid
+    assert np.isclose(model.ss.K,3.0)
+    assert par.Na == 30 and par.a_grid.size == 30
+    assert par.adaptive_grid
+
+    # b. prepare_hh_ss gives the grid the steady state is solved on
+    a_grid = par.a_grid.copy()
+    model.prepare_hh_ss()
+    assert np.allclose(par.a_grid,a_grid)
+
+    # c. warm start and cache are passed on
+    assert MockModel.calls[0]['warm_start'] and MockModel.calls[0]['cache'] is cache
+    assert len(obj_ss) > 0 and all(cache_ is cache for cache_ in obj_ss)
+
+def test_find_ss_adaptive_mock_fails(obj_ss,monkeypatch):
+
+    def obj_ss_failing(K_ss,model,do_print=False,warm_start=False,cache=None):
+        raise ValueError('household problem could not be solved')
+
+    monkeypatch.setattr(steady_state,'obj_ss',obj_ss_failing)
+
+    model = MockModel()
+
+    with pytest.raises(ValueError,match='no sign change'):
+        steady_state.find_ss(model,adaptive=True,Na_coarse=40)
+
+    assert model.par.Na == 60 and model.par.a_grid.size == 60 # restored
+    assert not model.par.adaptive_grid
+
+@pytest.mark.skipif(HANCModel is None,reason='GEModelTools is not installed')
+def test_find_ss_adaptive():
+
+    def new_model(name,Na):
+
+        model = HANCModel.HANCModelClass(name=name,par={'Na':Na})
+
+        ss = model.ss
+        ss.phi0 = 1.0
+        ss.phi1 = 2.0
+        ss.rK = 0.01
+        ss.w0 = 1.0
+        ss.w1 = 1.0
+        ss.Gamma = 1.0
+
+        return model
+
+    # a. full grid
+    model_full = new_model('full',200)
+    model_full.find_ss()
+
+    # b. adaptive grid with half the points
+    model = new_model('adaptive',200)
+    model.find_ss(adaptive=True,Na_coarse=50)
+
+    assert model.par.Na == 100
+    assert model.par.adaptive_grid # kept with the grid the steady state is solved on
+    assert np.isclose(model.ss.K,model_full.ss.K,rtol=1e-3)
+    assert np.isclose(model.ss.A_hh,model_full.ss.A_hh,rtol=1e-3)
@@ -0,0 +1,54 @@
+import sys
+import time
+import multiprocessing
+from types import SimpleNamespace
+import numpy as np
+import pytest
+
+from conftest import import_from
+
+steady_state = import_from('Assignment_I','steady_state')
+
+class MockModel():
+
+    def __init__(self,name='model'):
+
+        self.name = name
+        self.par = SimpleNamespace(warm_start=False)
+
+    def as_dict(self):
+
+        return {'par':self.par.__dict__.copy()}
+
+    def from_dict(self,model_dict,do_copy=False):
+
+        self.par.__dict__.update(model_dict['par'])
+
+def obj_ss(K_ss,model,do_print=False,warm_start=False,cache=None):
+    """ root at K = 2.5, slow for high K (running when the search stops), fails if warm_start is not passed on """
+
+    if warm_start != model.par.warm_start: raise ValueError('warm_start not passed on')
+    if K_ss > 5.0: time.sleep(0.5)
+
+    return K_ss-2.5
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork',reason='the patched obj_ss is only seen by forked workers')
+@pytest.mark.parametrize('warm_start',[False,True])
+def test_broad_search_parallel(monkeypatch,warm_start):
+
+    monkeypatch.setattr(steady_state,'obj_ss',obj_ss)
+    monkeypatch.setitem(sys.modules,'steady_state',steady_state) # workers and initializer are pickled by module name
+
+    model = MockModel()
+    model.par.warm_start = warm_start
+
+    K_ss_vec = np.linspace(1.0,10.0,10)
+    clearing_A = steady_state.broad_search_parallel(model,K_ss_vec,Nworkers=2,warm_start=warm_start)
+
+    # a. root bracketed and the evaluated values are correct (which are evaluated depends on timing)
+    assert steady_state.is_bracketed(clearing_A)
+    I = ~np.isnan(clearing_A)
+    assert np.allclose(clearing_A[I],K_ss_vec[I]-2.5)
+
+    # b. no worker outlives the search
+    assert len(multiprocessing.active_children()) == 0
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from consav.grids import equilogspace
+
+from hetools import egm
+
+@pytest.fixture
+def problem():
+
+    Na = 200
+    a_grid = equilogspace(0.0,50.0,Na)
+    beta = 0.96
+    sigma = 2.0
+    vbeg_a_plus = 1.02*(0.3+0.05*a_grid)**(-sigma)
+
+    return a_grid,vbeg_a_plus,beta,sigma
+
+@pytest.mark.parametrize('R,y',[(1.02,1.0),(1.00,0.1),(1.05,3.0)]) # the second is constrained at the bottom of the grid
+def test_egm_fused_equals_unfused(problem,R,y):
+
+    a_grid,vbeg_a_plus,beta,sigma = problem
+
+    outputs = []
+    for func in [egm.egm,egm.egm_unfused]:
+        a,c,v_a = np.zeros(a_grid.size),np.zeros(a_grid.size),np.zeros(a_grid.size)
+        func(a_grid,vbeg_a_plus,beta,sigma,R,y,a,c,v_a)
+        outputs.append((a,c,v_a))
+
+    for x_fused,x_unfused in zip(*outputs):
+        assert np.allclose(x_fused,x_unfused,rtol=1e-12,atol=1e-12)
+
+def test_egm_labor_equals_unfused(problem):
+
+    a_grid,vbeg_a_plus,beta,sigma = problem
+    nu,fac,z,wt,R,y = 2.0,0.8,1.2,1.1,1.02,0.2
+
+    a,c,ell,l = [np.zeros(a_grid.size) for _ in range(4)]
+    egm.egm_labor(a_grid,vbeg_a_plus,beta,sigma,nu,fac,z,wt,R,y,a,c,ell,l)
+
+    # unfused: endogenous grid and interpolation (no extrapolation needed above the first endogenous point)
+    c_endo = (beta*vbeg_a_plus)**(-1/sigma)
+    ell_endo = fac*c_endo**(-sigma/nu)
+    m_endo = c_endo + a_grid - wt*ell_endo*z
+    m = R*a_grid + y
+
+    I = m >= m_endo[0]
+    assert np.allclose(c[I],np.interp(m[I],m_endo,c_endo),rtol=1e-12)
+    assert np.allclose(ell[I],np.interp(m[I],m_endo,ell_endo),rtol=1e-12)
+    assert np.allclose(l,ell*z)
+    assert np.allclose(a,m+wt*l-c)
@@ -0,0 +1,37 @@
+from types import SimpleNamespace
+import numpy as np
+import pytest
+
+from conftest import import_from
+
+steady_state = import_from('Exam','steady_state')
+
+def create_model(name,T=20,r=0.002,scale=1.0):
+    """ model with G and taxes responding to a shock and Y, C_hh responding with the given scale """
+
+    G = 0.01*0.8**np.arange(T)
+
+    par = SimpleNamespace(T=T)
+    ss = SimpleNamespace(r=r,Y=1.0,C_hh=0.8,G=0.2,taxes=0.3)
+    path = SimpleNamespace(Y=(1.0+scale*G).reshape(T,1),C_hh=0.8+0.5*scale*G,G=0.2+G,taxes=0.3+0.5*G)
+
+    return SimpleNamespace(name=name,par=par,ss=ss,path=path)
+
+def test_fiscal_multipliers():
+
+    models = [create_model('a'),create_model('b',scale=2.0)]
+    table = steady_state.fiscal_multipliers(models,noms=('Y',),denoms=('G',))
+
+    assert np.allclose(table['Y/G'],[1.0,2.0])
+    assert np.allclose(table['Y/G (impact)'],[1.0,2.0])
+
+def test_fiscal_multipliers_different_T():
+
+    with pytest.raises(ValueError,match='par.T'):
+        steady_state.fiscal_multipliers([create_model('a',T=20),create_model('b',T=30)])
+
+@pytest.mark.parametrize('nom,denom',[('C','taxes'),('Y','B')])
+def test_fiscal_multiplier_invalid(nom,denom):
+
+    with pytest.raises(ValueError):
+        steady_state.fiscal_multiplier(create_model('a'),nom=nom,denom=denom)
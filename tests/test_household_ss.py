@@ -0,0 +1,91 @@
+from types import SimpleNamespace
+import numpy as np
+import pytest
+
+from consav.grids import equilogspace
+from consav.markov import log_rouwenhorst
+
+from hetools import household_ss, stationary_distribution
+
+class MockModel():
+    """ solve_hh_ss calls solve_hh_backwards until vbeg_a has converged (halves the distance each call) """
+
+    def __init__(self):
+
+        self.par = SimpleNamespace(hh_solver='plain',tol_solve=1e-8,max_iter_simulate=10_000,tol_simulate=1e-13,direct_D=False)
+        self.ss = SimpleNamespace()
+        self.solve_hh_backwards = self.step # instance attribute as set in settings()
+
+    @staticmethod
+    def step(par,vbeg_a_plus):
+
+        return 0.5*vbeg_a_plus
+
+    def solve_hh_ss(self,do_print=False,initial_guess=None):
+
+        vbeg_a = 1.0 if initial_guess is None else initial_guess['vbeg_a']
+        while vbeg_a > self.par.tol_solve:
+            vbeg_a = self.solve_hh_backwards(self.par,vbeg_a)
+
+    def simulate_hh_ss(self,do_print=False,Dbeg=None):
+
+        self.simulate_calls = getattr(self,'simulate_calls',0) + 1
+        if Dbeg is not None: self.ss.Dbeg = Dbeg
+
+def test_solve_hh_ss_counts_backward_calls():
+
+    model = MockModel()
+    original = model.solve_hh_backwards
+
+    assert household_ss.solve_hh_ss(model) == 27 # 0.5**27 < 1e-8
+    assert household_ss.solve_hh_ss(model,initial_guess={'vbeg_a':1e-7}) == 4 # warm start
+    assert model.solve_hh_backwards is original # restored
+
+def test_solve_hh_ss_hh_solver(monkeypatch):
+
+    def solve_hh_ss_accelerated(model,do_print=False,initial_guess=None):
+        vbeg_a = 1.0
+        for _ in range(3): vbeg_a = model.solve_hh_backwards(model.par,vbeg_a)
+        model.ss.vbeg_a = np.array(1e-9) # converged
+
+    monkeypatch.setattr(household_ss.household_solver,'solve_hh_ss_accelerated',solve_hh_ss_accelerated)
+
+    model = MockModel()
+
+    model.par.hh_solver = 'anderson'
+    assert household_ss.solve_hh_ss(model) == 3 # solve_hh_ss from the converged solution takes no steps in the mock
+
+    model.par.hh_solver = 'newton'
+    with pytest.raises(ValueError):
+        household_ss.solve_hh_ss(model)
+
+def test_simulate_hh_ss_iterated_equals_direct():
+
+    model = MockModel()
+    par = model.par
+    ss = model.ss
+
+    par.Nfix,Nz,Na = 2,3,40
+    par.a_grid = equilogspace(0.0,10.0,Na)
+    z_grid,z_trans,_,_,_ = log_rouwenhorst(0.9,0.3,Nz)
+
+    ss.z_trans = np.stack([z_trans]*par.Nfix)
+    ss.a = np.stack([np.clip(0.9*par.a_grid[np.newaxis,:]+z_grid[:,np.newaxis]-1.0+0.2*i_fix,0.0,par.a_grid[-1]) for i_fix in range(par.Nfix)])
+    ss.Dbeg = np.zeros((par.Nfix,Nz,Na))
+    ss.Dbeg[:,:,0] = 1/(par.Nfix*Nz)
+
+    it = household_ss.simulate_hh_ss(model,count=True)
+    assert it > 1
+    assert np.allclose(ss.Dbeg,stationary_distribution.find_Dbeg_direct(model),atol=1e-10)
+
+    par.direct_D = True
+    assert household_ss.simulate_hh_ss(model) == 0
+
+def test_simulate_hh_ss_default_uses_model():
+
+    model = MockModel()
+    model.ss.Dbeg = np.ones(3)/3
+
+    assert household_ss.simulate_hh_ss(model) is None # not counted
+    assert model.simulate_calls == 1
+    assert np.allclose(model.ss.Dbeg,1/3)
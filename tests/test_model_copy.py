@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+import numpy as np
+
+from hetools import model_copy
+
+class MockModel():
+
+    def __init__(self,name,N=100_000):
+
+        self.name = name
+        self.par = SimpleNamespace(T=10,a_grid=np.linspace(0.0,1.0,N))
+        self.ss = SimpleNamespace(D=np.ones(N)/N,A=1.0)
+        self.path = SimpleNamespace(A=np.zeros((10,N)),small=np.zeros(10))
+        self.jac = {('A','r'):np.eye(200)}
+
+def test_copy_cow_isolation():
+
+    model = MockModel('model')
+    A = model.path.A.copy()
+
+    other = model_copy.copy_cow(model)
+    assert other.name == 'model_copy'
+
+    # a. changes in the copy do not change the model
+    other.path.A[0] = 1.0
+    other.path.small[:] = 1.0
+    other.jac[('A','r')][0,0] = 2.0
+    other.ss.A = 2.0
+
+    assert np.array_equal(model.path.A,A)
+    assert np.all(model.path.small == 0.0)
+    assert model.jac[('A','r')][0,0] == 1.0
+    assert model.ss.A == 1.0
+
+    # b. changes in the model do not change the copy
+    model.ss.D[:] = 0.0
+    assert np.allclose(other.ss.D,1/other.ss.D.size)
+
+    # c. a later copy has the changed content
+    third = model_copy.copy_cow(model,name='third')
+    assert np.all(third.ss.D == 0.0)
+    assert np.all(third.path.A[0] == 0.0)
+
+    third.ss.D[:] = 1.0
+    assert np.all(model.ss.D == 0.0)
+    assert np.allclose(other.ss.D,1/other.ss.D.size)
+
+def test_copy_cow_shared_references():
+
+    model = MockModel('model')
+    model.ss.D_alias = model.ss.D # same array twice
+
+    other = model_copy.copy_cow(model)
+    other.ss.D[0] = 5.0
+
+    assert other.ss.D_alias[0] == 5.0 # still the same array in the copy
+    assert model.ss.D[0] == model.ss.D_alias[0] == 1/model.ss.D.size
+
+def test_copy_cow_model_unchanged():
+
+    model = MockModel('model')
+    A = model.path.A
+
+    other = model_copy.copy_cow(model)
+
+    assert model.path.A is A and A.flags.owndata # not replaced by a map
+    assert not other.path.A.flags.owndata # mapped
+    assert type(other.path.A) is np.ndarray
+
+    # the backing file is reused while the array is unchanged
+    third = model_copy.copy_cow(model)
+    assert model_copy._files[id(A)][1] == model_copy._files[id(third.path.A)][1]
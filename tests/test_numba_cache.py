@@ -0,0 +1,29 @@
+import os
+import pickle
+from collections import namedtuple
+
+from hetools import numba_cache
+
+def test_stable_namedtuple_is_pickled_by_reference():
+
+    cls = numba_cache.stable_namedtuple(namedtuple('par',['a','b']))
+
+    assert cls is numba_cache.stable_namedtuple(namedtuple('par',['a','b'])) # same class for same fields
+    assert not cls is numba_cache.stable_namedtuple(namedtuple('par',['a','c']))
+
+    x = cls(1.0,2.0)
+    assert type(pickle.loads(pickle.dumps(x))) is cls
+
+def test_clear_cache_in_subfolders(tmp_path):
+
+    filenames = [tmp_path/'Exam'/'__pycache__'/'household_problem.f-1.py311.nbi',tmp_path/'hetools'/'__pycache__'/'egm.egm-13.py311.1.nbc']
+    keep = tmp_path/'hetools'/'__pycache__'/'egm.cpython-311.pyc'
+
+    for filename in filenames + [keep]:
+        os.makedirs(filename.parent,exist_ok=True)
+        filename.write_bytes(b'')
+
+    numba_cache.clear_cache(str(tmp_path))
+
+    assert not any(filename.exists() for filename in filenames)
+    assert keep.exists()
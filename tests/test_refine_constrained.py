@@ -0,0 +1,53 @@
+from collections import namedtuple
+import numpy as np
+import pytest
+
+from consav.grids import equilogspace
+
+from conftest import import_from
+
+# the labor supply foc at the borrowing constraint of the Assignment_II model
+
+household_problem = import_from('Assignment_II','household_problem')
+
+Par = namedtuple('Par',['Na','a_grid','sigma','nu','varphi','max_iter_ell','tol_ell','ell_stats'])
+
+def create_par(Na=20):
+
+    return Par(Na,equilogspace(0.0,10.0,Na),2.0,1.0,1.0,200,1e-12,np.zeros((1,5)))
+
+@pytest.mark.parametrize('chi',[0.0,0.1,-0.1,-0.46])
+def test_refine_constrained(chi):
+
+    par = create_par()
+
+    z = 1.0
+    wt = 0.7
+    r = 0.02
+    fac = (wt*z/par.varphi)**(1/par.nu)
+
+    # constrained at the first Ncon points with an interpolated guess of zero labor supply
+    Ncon = 5
+    a = np.zeros(par.Na)
+    a[Ncon:] = 1.0
+    c = np.zeros(par.Na)
+    ell = np.zeros(par.Na)
+    l = np.zeros(par.Na)
+    work = [np.zeros(par.Na) for _ in range(3)]
+    done = np.zeros(par.Na,dtype=np.bool_)
+
+    failed = household_problem.refine_constrained(par,fac,z,wt,r,chi,0,a,c,ell,l,*work,done)
+    assert not failed
+
+    # foc and budget hold at the constrained points
+    c_ = (1+r)*par.a_grid[:Ncon] + wt*z*ell[:Ncon] + chi
+    assert np.all(c_ > 0.0)
+    assert np.allclose(c[:Ncon],c_)
+    assert np.allclose(ell[:Ncon],fac*c_**(-par.sigma/par.nu),atol=1e-10)
+    assert np.allclose(l[:Ncon],ell[:Ncon]*z)
+    assert np.all(a[:Ncon] == 0.0)
+
+    if chi < 0.0: # the bound for chi >= 0 is below the root at a_lag = 0
+
+        ell_hi_m0 = (fac*(wt*z)**(-par.sigma/par.nu))**(par.nu/(par.nu+par.sigma))
+        assert ell[0] > ell_hi_m0
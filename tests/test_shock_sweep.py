@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+import numpy as np
+import pytest
+
+from hetools import shock_sweep
+
+class MockModel():
+    """ linear model where the response of Y to the shock is the shock itself """
+
+    def __init__(self,T=10):
+
+        self.par = SimpleNamespace(T=T,jump_G=0.5,rho_G=0.8)
+        self.ss = SimpleNamespace(Y=1.0)
+        self.IRF = {}
+
+    def find_IRFs(self,shocks,reuse_G_U=False):
+
+        par = self.par
+        for shock in shocks:
+            self.IRF['Y'] = par.__dict__[f'jump_{shock}']*par.__dict__[f'rho_{shock}']**np.arange(par.T)
+
+def test_shock_sweep():
+
+    model = MockModel()
+    jumps = np.array([0.1,-0.2])
+    rhos = np.array([0.5,0.9])
+
+    IRFs,check = shock_sweep.shock_sweep(model,'G',jumps,rhos)
+
+    t = np.arange(model.par.T)
+    for i_jump,jump in enumerate(jumps):
+        for i_rho,rho in enumerate(rhos):
+            assert np.allclose(IRFs['Y'][i_jump,i_rho],jump*rho**t)
+
+    assert check is None
+    assert model.par.jump_G == 0.5 and model.par.rho_G == 0.8 # restored
+
+def test_shock_sweep_undefined_shock():
+
+    model = MockModel()
+
+    with pytest.raises(ValueError,match='jump_u_bar'):
+        shock_sweep.shock_sweep(model,'u_bar',[0.1],[0.5])
+
+    assert not 'jump_u_bar' in model.par.__dict__
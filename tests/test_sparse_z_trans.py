@@ -0,0 +1,185 @@
+from collections import namedtuple
+import numpy as np
+import pytest
+
+from consav.grids import equilogspace
+
+from conftest import import_from
+from hetools import stationary_distribution
+
+# the sparse z transition of the Exam model (two non-zero elements per row) against the dense z_trans
+
+household_problem = import_from('Exam','household_problem')
+
+Par = namedtuple('Par',['Nfix','Nz','Na','T','i_u_hh','i_z_next','is_HtM','full_z_trans','a_grid','max_iter_simulate','tol_simulate',
+                        'beta_grid','sigma','phi_obar','phi_ubar'])
+
+def create_par(full_z_trans=False,Nfix=3,Nu=4,Na=30,T=5):
+
+    Nz = Nu+1
+
+    i_u_hh = np.zeros((Nfix,Nz))
+    i_u_hh[:,1:] = np.arange(1,Nu+1)
+
+    is_HtM = np.zeros(Nfix,dtype=np.bool_)
+    is_HtM[0] = True
+
+    return Par(Nfix,Nz,Na,T,i_u_hh,np.fmin(np.arange(Nz)+1,Nz-1),is_HtM,full_z_trans,equilogspace(0.0,20.0,Na),10_000,1e-13,
+               np.array([0.0,0.99,0.995])[:Nfix],2.0,0.7,0.4)
+
+def z_trans_sparse_and_dense(par,delta=0.02,lambda_u_s=0.3):
+
+    s = np.zeros((par.Nfix,par.Nz,par.Na))
+    household_problem.fill_s(par,s)
+
+    z_trans_0 = household_problem.alloc_z_trans_0(par)
+    household_problem.fill_z_trans_0(par,z_trans_0,delta,lambda_u_s,s)
+
+    z_trans = np.zeros((par.Nfix,par.Na,par.Nz,par.Nz) if par.full_z_trans else (par.Nfix,par.Nz,par.Nz))
+    household_problem.fill_z_trans_from_0(par,z_trans,z_trans_0)
+
+    return z_trans_0,z_trans
+
+def policy(par):
+    """ savings policy (zero for HtM) """
+
+    a = np.clip(0.9*par.a_grid+0.5-0.1*np.arange(par.Nz)[:,np.newaxis],0.0,par.a_grid[-1])
+    a = np.stack([np.zeros_like(a) if par.is_HtM[i_fix] else a*(1+0.1*i_fix) for i_fix in range(par.Nfix)])
+
+    return a
+
+def dense_z_trans(par,z_trans,i_fix,i_a):
+
+    return z_trans[i_fix,i_a] if par.full_z_trans else z_trans[i_fix]
+
+def initial_distribution(par):
+
+    rng = np.random.default_rng(1)
+    Dbeg = rng.uniform(size=(par.Nfix,par.Nz,par.Na))
+    Dbeg[par.is_HtM,:,1:] = 0.0 # HtM households have a = 0
+
+    return Dbeg/np.sum(Dbeg)
+
+@pytest.mark.parametrize('full_z_trans',[False,True])
+def test_expectation_sparse_equals_dense(full_z_trans):
+
+    par = create_par(full_z_trans)
+    z_trans_0,z_trans = z_trans_sparse_and_dense(par)
+
+    v_a = np.random.default_rng(0).uniform(size=(par.Nfix,par.Nz,par.Na))
+    vbeg_a = np.zeros_like(v_a)
+    household_problem.expectation_sparse(par,z_trans_0,v_a,vbeg_a)
+
+    for i_fix in range(par.Nfix):
+        if par.is_HtM[i_fix]: continue
+        for i_a in range(par.Na):
+            assert np.allclose(vbeg_a[i_fix,:,i_a],dense_z_trans(par,z_trans,i_fix,i_a)@v_a[i_fix,:,i_a],rtol=1e-14)
+
+@pytest.mark.parametrize('full_z_trans',[False,True])
+def test_forward_step_sparse_equals_dense(full_z_trans):
+
+    par = create_par(full_z_trans)
+    z_trans_0,z_trans = z_trans_sparse_and_dense(par)
+    Dbeg = initial_distribution(par)
+
+    D = np.zeros_like(Dbeg)
+    household_problem.simulate_forwards_exo_sparse(par,z_trans_0,Dbeg,D)
+
+    for i_fix in range(par.Nfix):
+        for i_a in range(par.Na):
+            assert np.allclose(D[i_fix,:,i_a],dense_z_trans(par,z_trans,i_fix,i_a).T@Dbeg[i_fix,:,i_a],rtol=1e-14,atol=1e-16)
+
+def test_stationary_distribution_sparse_equals_direct():
+
+    par = create_par()
+    z_trans_0,z_trans = z_trans_sparse_and_dense(par)
+    a = policy(par)
+
+    Dbeg = initial_distribution(par)
+    mass = np.sum(Dbeg,axis=(1,2))
+
+    # a. sparse iteration
+    i,w = stationary_distribution.lottery(par.a_grid,a)
+    it = household_problem.find_Dbeg_sparse(par,z_trans_0,i,w,Dbeg,np.zeros_like(Dbeg))
+    assert it > 1
+
+    # b. direct solve with the dense z_trans
+    ss = namedtuple('SS',['Dbeg','z_trans','a'])(initial_distribution(par),z_trans,a)
+    model = namedtuple('Model',['par','ss'])(par,ss)
+
+    Dbeg_direct = stationary_distribution.find_Dbeg_direct(model)
+
+    assert np.allclose(np.sum(Dbeg,axis=(1,2)),mass)
+    assert np.allclose(Dbeg,Dbeg_direct,atol=1e-10)
+
+def test_path_starts_from_initial_distribution():
+
+    par = create_par()
+    z_trans_0,_ = z_trans_sparse_and_dense(par)
+    a = policy(par)
+    i,w = stationary_distribution.lottery(par.a_grid,a)
+
+    Dbeg_ini = initial_distribution(par)
+    household_problem.find_Dbeg_sparse(par,z_trans_0,i,w,Dbeg_ini,np.zeros_like(Dbeg_ini)) # stationary
+
+    Dbeg = np.zeros((par.T,)+Dbeg_ini.shape)
+    D = np.zeros_like(Dbeg)
+    household_problem.simulate_path_sparse(par,np.stack([z_trans_0]*par.T),np.stack([i]*par.T),np.stack([w]*par.T),Dbeg_ini,Dbeg,D)
+
+    assert np.allclose(Dbeg,Dbeg_ini[np.newaxis],atol=1e-12) # stays stationary
+
+@pytest.mark.parametrize('full_z_trans',[False,True])
+def test_z_trans_rows_sum_to_one(full_z_trans):
+
+    par = create_par(full_z_trans)
+    _,z_trans = z_trans_sparse_and_dense(par)
+
+    assert np.allclose(np.sum(z_trans,axis=-1),1.0,rtol=0.0,atol=1e-15)
+    assert np.all(np.sum(z_trans > 0,axis=-1) <= 2) # at most two non-zero elements per row
+
+    household_problem.fill_z_trans_from_0(par,z_trans,household_problem.alloc_z_trans_0(par)) # filled again (no accumulation)
+    assert np.allclose(np.sum(z_trans,axis=-1),1.0,rtol=0.0,atol=1e-15)
+
+def test_z_trans_shape_mismatch():
+
+    par = create_par(full_z_trans=True)
+    z_trans_0 = household_problem.alloc_z_trans_0(par) # with asset dimension
+
+    with pytest.raises(AssertionError):
+        household_problem.fill_z_trans_from_0(par,np.zeros((par.Nfix,par.Nz,par.Nz)),z_trans_0)
+
+def test_HtM_point_mass():
+
+    par = create_par()
+    z_trans_0,_ = z_trans_sparse_and_dense(par)
+    a = policy(par)
+    i,w = stationary_distribution.lottery(par.a_grid,a)
+
+    Dbeg = initial_distribution(par)
+    mass = np.sum(Dbeg[par.is_HtM])
+
+    household_problem.find_Dbeg_sparse(par,z_trans_0,i,w,Dbeg,np.zeros_like(Dbeg))
+
+    assert np.isclose(np.sum(Dbeg[par.is_HtM,:,0]),mass)
+    assert np.all(Dbeg[par.is_HtM,:,1:] == 0.0)
+
+def test_solve_hh_backwards_HtM():
+
+    par = create_par()
+    z_trans_0,z_trans = z_trans_sparse_and_dense(par)
+
+    r,w,tau,div,transfer,u_bar = 0.002,0.9,0.3,0.05,-0.05,6.0
+    shape = (par.Nfix,par.Nz,par.Na)
+    vbeg_a_plus = np.broadcast_to((0.5+0.05*par.a_grid)**(-par.sigma),shape).copy()
+    vbeg_a,a,c,u_ALL,u_UI = [np.nan*np.ones(shape) for _ in range(5)]
+
+    household_problem.solve_hh_backwards(par,z_trans,0.02,0.3,w,r,tau,div,transfer,vbeg_a_plus,vbeg_a,a,c,u_ALL,u_UI,u_bar)
+
+    # a. HtM: consume income at a = 0 (the whole row is set)
+    y = (1-tau)*w*np.where(par.i_u_hh[0] == 0,1.0,par.phi_obar) + div + transfer # u_bar > Nu: all have high UI
+    assert np.all(a[par.is_HtM] == 0.0)
+    assert np.allclose(c[0],y[:,np.newaxis])
+
+    # b. others: budget constraint
+    m = (1+r)*par.a_grid + ((1-tau)*w*np.where(par.i_u_hh == 0,1.0,par.phi_obar) + div + transfer)[:,:,np.newaxis]
+    assert np.allclose(a[~par.is_HtM]+c[~par.is_HtM],m[~par.is_HtM])
@@ -0,0 +1,30 @@
+from types import SimpleNamespace
+import numpy as np
+import pytest
+
+from conftest import import_from
+
+steady_state = import_from('Exam','steady_state')
+
+def create_model():
+
+    par = SimpleNamespace(RA=True,A_hh_RA=np.nan,r_ss=0.002,tau_ss=0.3,delta_q=0.99,phi_obar=0.7,phi_ubar=0.4,beta_RA=np.nan,jump_G=0.0)
+    ss = SimpleNamespace(div=0.0,U_UI_hh=0.04,A_hh=0.5,r=0.002,w=0.75,u=0.0625,tau=0.3,transfer=0.0,TFP=1.0)
+
+    return SimpleNamespace(par=par,ss=ss)
+
+def test_find_ss_RA_requires_assets():
+
+    model = create_model()
+
+    with pytest.raises(ValueError,match='model_HANK'):
+        steady_state.find_ss_RA(model)
+
+def test_find_ss_government_quiet(capsys):
+
+    model = create_model()
+
+    steady_state.find_ss_government(model,do_print=False)
+
+    assert np.isclose(model.par.beta_RA,1/(1+model.ss.r))
+    assert capsys.readouterr().out == ''
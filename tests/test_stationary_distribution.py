@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+import numpy as np
+import pytest
+
+from consav.grids import equilogspace
+from consav.markov import log_rouwenhorst
+
+from hetools import stationary_distribution
+
+def iterate_Dbeg(z_trans,a_grid,a,Dbeg,tol=1e-14,max_iter=100_000):
+    """ stationary distribution by forward iteration (reference) """
+
+    i,w = stationary_distribution.lottery(a_grid,a)
+    Nz,Na = a.shape
+
+    for _ in range(max_iter):
+
+        # a. z transition (z_trans is Nz x Nz or Na x Nz x Nz)
+        if z_trans.ndim == 2:
+            D = z_trans.T@Dbeg
+        else:
+            D = np.einsum('ajz,ja->za',z_trans,Dbeg)
+
+        # b. lottery
+        Dbeg_new = np.zeros_like(Dbeg)
+        for i_z in range(Nz):
+            np.add.at(Dbeg_new[i_z],i[i_z],w[i_z]*D[i_z])
+            np.add.at(Dbeg_new[i_z],i[i_z]+1,(1-w[i_z])*D[i_z])
+
+        if np.max(np.abs(Dbeg_new-Dbeg)) < tol: return Dbeg_new
+        Dbeg = Dbeg_new
+
+    raise ValueError('no convergence')
+
+@pytest.mark.parametrize('full_z_trans',[False,True])
+def test_direct_equals_iterated(full_z_trans):
+
+    # a. model with two fixed types
+    Nfix,Nz,Na = 2,3,60
+    a_grid = equilogspace(0.0,20.0,Na)
+    z_grid,z_trans,_,_,_ = log_rouwenhorst(0.9,0.3,Nz)
+
+    if full_z_trans: # the chain depends on beginning-of-period assets
+        z_trans = np.stack([(1-x)*z_trans + x*np.eye(Nz) for x in np.linspace(0.0,0.5,Na)])
+
+    a = np.stack([np.clip(0.95*a_grid[np.newaxis,:] + 0.5*(z_grid[:,np.newaxis]-1.0+0.1*i_fix),0.0,a_grid[-1]) for i_fix in range(Nfix)])
+
+    mass = np.array([0.3,0.7])
+    Dbeg = np.ones((Nfix,Nz,Na))*mass[:,np.newaxis,np.newaxis]/(Nz*Na)
+
+    par = SimpleNamespace(Nfix=Nfix,a_grid=a_grid)
+    ss = SimpleNamespace(Dbeg=Dbeg,z_trans=np.stack([z_trans]*Nfix),a=a)
+    model = SimpleNamespace(par=par,ss=ss)
+
+    # b. compare
+    Dbeg_direct = stationary_distribution.find_Dbeg_direct(model)
+
+    for i_fix in range(Nfix):
+        Dbeg_iterated = iterate_Dbeg(ss.z_trans[i_fix],a_grid,a[i_fix],Dbeg[i_fix])
+        assert np.isclose(np.sum(Dbeg_direct[i_fix]),mass[i_fix])
+        assert np.allclose(Dbeg_direct[i_fix],Dbeg_iterated,atol=1e-10)
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from conftest import import_from
+
+toeplitz_jacobian = import_from('Exam','toeplitz_jacobian')
+ToeplitzJacobian = toeplitz_jacobian.ToeplitzJacobian
+
+def jacobian_from_fake_news(T,H,seed):
+    """ dense Jacobian J[t,s] = J[t-1,s-1] + F[t,s] with a fake news matrix F which is zero outside its H x H corner """
+
+    rng = np.random.default_rng(seed)
+
+    F = np.zeros((T,T))
+    F[:H,:H] = rng.normal(size=(H,H))*0.5**np.add.outer(np.arange(H),np.arange(H))
+
+    J = F.copy()
+    for t in range(1,T):
+        J[t,1:] += J[t-1,:-1]
+
+    return J
+
+@pytest.fixture
+def jacs():
+
+    T = 60
+    J = jacobian_from_fake_news(T,8,0)
+    K = jacobian_from_fake_news(T,5,1)
+
+    return J,K,ToeplitzJacobian.from_dense(J),ToeplitzJacobian.from_dense(K)
+
+def test_from_dense(jacs):
+
+    J,_K,jac,_jac_K = jacs
+
+    assert jac.H == 8 and jac.k > 0 # corner correction is used
+    assert jac.error < 1e-8
+    assert np.allclose(jac.to_dense(),J,atol=1e-8)
+    assert jac.nbytes < J.nbytes
+
+def test_products(jacs):
+
+    J,_K,jac,_jac_K = jacs
+
+    rng = np.random.default_rng(2)
+    x = rng.normal(size=J.shape[0])
+    X = rng.normal(size=(J.shape[0],3))
+
+    assert np.allclose(jac@x,J@x,atol=1e-8)
+    assert np.allclose(jac@X,J@X,atol=1e-8)
+    assert np.allclose(X.T@jac,X.T@J,atol=1e-8)
+    assert np.allclose(jac.transpose().to_dense(),J.T,atol=1e-8)
+
+def test_combination(jacs):
+
+    J,K,jac,jac_K = jacs
+
+    assert np.allclose((jac+jac_K).to_dense(),J+K,atol=1e-8)
+    assert np.allclose((2.0*jac).to_dense(),2.0*J,atol=1e-8)
+    assert np.allclose((jac*2.0).to_dense(),2.0*J,atol=1e-8)
+    assert np.allclose((-jac).to_dense(),-J,atol=1e-8)
+    assert np.allclose(jac+K,J+K,atol=1e-8) # dense other
+    assert np.allclose(jac@jac_K,J@K,atol=1e-8)
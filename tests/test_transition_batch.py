@@ -0,0 +1,74 @@
+import copy
+from types import SimpleNamespace
+import numpy as np
+
+from conftest import import_from
+
+transition_batch = import_from('Exam','transition_batch')
+
+class MockModel():
+    """ targets H_U dx + 0.05 dx**2 - shock - ini.shift in the deviations dx of the unknowns K and r from the steady state """
+
+    def __init__(self,name='model',T=30):
+
+        self.name = name
+        self.par = SimpleNamespace(T=T,tol_broyden=1e-10,max_iter_broyden=100)
+        self.ss = SimpleNamespace(K=2.0,r=0.02)
+        self.path = SimpleNamespace(x=None)
+        self.unknowns = ['K','r']
+
+        n = len(self.unknowns)*T
+        rng = np.random.default_rng(0)
+        self.H_U = np.eye(n) + 0.2*rng.normal(size=(n,n))/np.sqrt(n)
+
+        self.x_ss = np.repeat([self.ss.K,self.ss.r],T)
+
+    def _set_ini(self,ini_input):
+
+        self.shift = ini_input.get('shift',0.0)
+
+    def _set_shocks(self,shock_specs):
+
+        self.shock = np.concatenate([shock_specs.get('dZ',np.zeros(self.par.T)),np.zeros(self.par.T)])
+
+    def _path_obj(self,x):
+
+        self.path.x = x.copy()
+        dx = x-self.x_ss
+
+        return self.H_U@dx + 0.05*dx**2 - self.shock - self.shift
+
+    def copy(self,name=None):
+
+        other = copy.deepcopy(self)
+        if name is not None: other.name = name
+
+        return other
+
+def test_batch_equals_single():
+
+    model = MockModel()
+    t = np.arange(model.par.T)
+
+    scenarios = {
+        'small':{'dZ':0.01*0.8**t},
+        'large':{'dZ':-0.2*0.9**t},
+        'ini':{'shocks':{'dZ':0.05*0.5**t},'ini':{'shift':0.01}},
+    }
+
+    # a. batched
+    results = transition_batch.find_transition_paths(model,scenarios)
+    assert set(results) == set(scenarios)
+
+    # b. one at a time
+    for name,spec in scenarios.items():
+
+        result = transition_batch.find_transition_paths(model,{name:spec})[name]
+
+        assert results[name].name == name
+        assert np.allclose(results[name].path.x,result.path.x,atol=1e-9)
+
+        # solution
+        spec_ = {'shocks':spec.get('shocks',spec),'ini':spec.get('ini',{})}
+        errors = transition_batch._evaluate(model,spec_,results[name].path.x)
+        assert np.max(np.abs(errors)) < model.par.tol_broyden